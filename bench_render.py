@@ -0,0 +1,123 @@
+"""
+Benchmark de dibujo sin ventana (SDL_VIDEODRIVER=dummy).
+
+Compara cada técnica de caché de pong_dualsense.py con el dibujo directo
+que hacía antes en cada frame.
+
+Uso:
+    python bench_render.py
+"""
+import os
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pong_dualsense as game  # noqa: E402  (necesita las variables SDL antes)
+
+
+def time_per_call(fn, n=300):
+    """Tiempo medio por llamada en microsegundos."""
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+def bench_static_layers():
+    canvas = game.canvas
+    redraw = time_per_call(lambda: game.draw_static_background(canvas))
+    cached = time_per_call(lambda: game.blit_static_background(canvas))
+    return redraw, cached
+
+
+def bench_present(window=(1320, 1200)):
+    """Frame completo (smoothscale de todo el canvas) frente a dirty rects típicos."""
+    import pygame
+    game.screen = pygame.display.set_mode(window, pygame.RESIZABLE)
+    game.blit_static_background(game.canvas)
+    # Panel, cabeza/cuerpo de la serpiente, comida, marcador y mando
+    dirty = [game.PANEL_CONTENT_RECT, pygame.Rect(400, 300, 180, 70), pygame.Rect(520, 420, 66, 66),
+             pygame.Rect(420, 6, 320, 26), pygame.Rect(356, 626, 168, 170)]
+    full = time_per_call(lambda: game.present_frame(None), n=100)
+    partial = time_per_call(lambda: game.present_frame(dirty), n=100)
+    game.screen = pygame.display.set_mode((game.SCREEN_W, game.SCREEN_H), pygame.RESIZABLE)
+    return full, partial
+
+
+def bench_sprites(length=20):
+    """Serpiente de `length` segmentos: primitivas de pygame.draw frente a blits del atlas."""
+    import pygame
+    canvas = game.canvas
+    sprites = game.sprite_atlas()
+    positions = [(game.LEFT_PANEL_W + 2 + (i % 10) * game.CELL_SIZE, 2 + (i // 10) * game.CELL_SIZE)
+                 for i in range(length)]
+    head = pygame.Surface((game.SPRITE_BOX, game.SPRITE_BOX), pygame.SRCALPHA)
+
+    def draw_primitives():
+        game.draw_head_sprite(head)
+        canvas.blit(head, positions[0])
+        for i, (x, y) in enumerate(positions[1:], 1):
+            seg_rect = pygame.Rect(x, y, game.SEG_SIZE, game.SEG_SIZE)
+            pygame.draw.rect(canvas, (30, 80, max(80, 180 - min(100, i * 5))), seg_rect, border_radius=4)
+            pygame.draw.rect(canvas, (90, 140, 220), seg_rect, 1, border_radius=4)
+
+    def draw_atlas():
+        canvas.blits([(sprites, positions[0], game.HEAD_RECTS[game.UP])] +
+                     [(sprites, pos, game.BODY_RECTS[min(i, game.BODY_BUCKETS - 1)])
+                      for i, pos in enumerate(positions[1:], 1)])
+
+    return time_per_call(draw_primitives), time_per_call(draw_atlas)
+
+
+def bench_particles(n=5000):
+    """Un frame con n partículas: dicts + Surface por partícula frente a ParticlePool."""
+    import random
+    import pygame
+    import pygame.gfxdraw
+    from particles import ParticlePool
+    canvas = game.canvas
+    cx, cy = game.LEFT_PANEL_W + game.GAME_W // 2, game.GAME_H // 2
+    # Vida muy larga para que el número de partículas no cambie durante la medida
+    life = 10 ** 6
+    dicts = [{'x': cx, 'y': cy, 'vx': random.uniform(-2.5, 2.5), 'vy': random.uniform(-2.5, 2.5),
+              'life': life, 'maxlife': life, 'clr': (255, 170, 60), 'size': random.randint(2, 5)}
+             for _ in range(n)]
+    pool = ParticlePool(capacity=n)
+    pool.emit(cx, cy, n, life=(life - 1000, life - 1000), maxlife=life, speed=0.5)
+
+    def frame_dicts():
+        nonlocal dicts
+        new_particles = []
+        for p in dicts:
+            p['x'] += p['vx']
+            p['y'] += p['vy']
+            p['vx'] *= 0.96
+            p['vy'] *= 0.96
+            p['life'] -= 1
+            alpha = int(255 * (p['life'] / p['maxlife']))
+            if alpha > 0:
+                surf = pygame.Surface((p['size'] * 2, p['size'] * 2), pygame.SRCALPHA)
+                pygame.gfxdraw.filled_circle(surf, p['size'], p['size'], p['size'], (*p['clr'], alpha))
+                canvas.blit(surf, (int(p['x'] - p['size']), int(p['y'] - p['size'])))
+                new_particles.append(p)
+        dicts = new_particles
+
+    def frame_pool():
+        pool.update()
+        pool.draw(canvas)
+
+    return time_per_call(frame_dicts, n=30), time_per_call(frame_pool, n=30)
+
+
+def report(name, before, after):
+    print(f"{name:<28} antes {before:8.1f} us/frame   ahora {after:8.1f} us/frame   "
+          f"ahorro {before - after:8.1f} us ({before / max(after, 1e-9):.1f}x)")
+
+
+if __name__ == "__main__":
+    report("Capas estáticas", *bench_static_layers())
+    report("Presentación (dirty rects)", *bench_present())
+    report("Sprites de la serpiente", *bench_sprites())
+    report("Partículas (5000)", *bench_particles())
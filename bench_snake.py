@@ -0,0 +1,70 @@
+"""
+Benchmark del motor de Snake sin ventana.
+
+Uso:
+    python bench_snake.py
+"""
+import random
+import time
+
+from snake_engine import SnakeEngine, UP, DOWN, LEFT, RIGHT, GAME_OVER
+
+DIRS = (UP, DOWN, LEFT, RIGHT)
+
+
+def bench_steps(n_steps=500_000, seed=1234):
+    """Pasos por segundo con giros aleatorios en el tablero por defecto."""
+    engine = SnakeEngine(seed=seed)
+    actions = random.Random(seed)
+    turns = [actions.choice(DIRS) if actions.random() < 0.2 else None for _ in range(1024)]
+    step = engine.step
+
+    t0 = time.perf_counter()
+    for i in range(n_steps):
+        if step(turns[i & 1023]) == GAME_OVER:
+            engine.reset(seed + i)
+    elapsed = time.perf_counter() - t0
+    return n_steps / elapsed
+
+
+def hamiltonian_cycle(w, h):
+    """Ciclo que recorre todas las celdas (h par): filas en zigzag y vuelta por x=0."""
+    cycle = []
+    for y in range(h):
+        xs = range(1, w) if y % 2 == 0 else range(w - 1, 0, -1)
+        if y == 0:
+            cycle.append((0, 0))
+        cycle.extend((x, y) for x in xs)
+    cycle.extend((0, y) for y in range(h - 1, 0, -1))
+    return cycle
+
+
+def bench_long_snake(length, grid=128, n_steps=200_000, seed=1234):
+    """Pasos por segundo con una serpiente de `length` segmentos siguiendo un ciclo."""
+    engine = SnakeEngine(grid_w=grid, seed=seed)
+    cycle = hamiltonian_cycle(grid, grid)
+    n = len(cycle)
+    # Dirección a tomar desde cada celda para seguir el ciclo
+    next_dir = {}
+    for i, (x, y) in enumerate(cycle):
+        nx, ny = cycle[(i + 1) % n]
+        next_dir[(x, y)] = (nx - x, ny - y)
+    # Cabeza en cycle[length - 1], cuerpo hacia atrás por el ciclo
+    body = [cycle[i] for i in range(length - 1, -1, -1)]
+    engine.set_body(body, next_dir[body[1]])
+    step = engine.step
+
+    t0 = time.perf_counter()
+    for _ in range(n_steps):
+        if step(next_dir[engine.snake[0]]) == GAME_OVER:
+            raise RuntimeError("la serpiente no debería morir siguiendo el ciclo")
+    elapsed = time.perf_counter() - t0
+    return n_steps / elapsed, len(engine)
+
+
+if __name__ == "__main__":
+    print(f"Pasos/s (10x10, giros aleatorios): {bench_steps():,.0f}")
+    # 16_220 segmentos ~ 99% del tablero: la comida se regenera muy a menudo
+    for length in (10, 1_000, 8_000, 16_220):
+        rate, final_len = bench_long_snake(length)
+        print(f"Pasos/s (128x128, longitud {length:>5} -> {final_len:>5}): {rate:,.0f}")
@@ -0,0 +1,457 @@
+"""
+Registro de entradas HID en buffers circulares de NumPy.
+
+Cada evento es un registro de tamaño fijo (marca de tiempo monotónica,
+tipo, código y valor). Añadir es O(1) y las últimas N entradas se leen
+como una vista del array, sin copiar.
+"""
+import math
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# Tipos de registro (coinciden con el primer byte de los paquetes RAW)
+KIND_AXIS = 0x41    # 'A' <eje> <valor8>
+KIND_BUTTON = 0x42  # 'B' <botón>
+KIND_HAT = 0x48     # 'H' <x> <y>
+KIND_SPEED = 0x53   # 'S' cambio de velocidad (value = celdas/s); sin paquete RAW
+KIND_LIFE = 0x4C    # 'L' vida perdida (value = vidas restantes); sin paquete RAW
+KIND_KEY = 0x4B     # 'K' tecla de juego (code = tecla de pygame); sin paquete RAW
+HID_KINDS = (KIND_AXIS, KIND_BUTTON, KIND_HAT)
+
+# t: segundos de time.perf_counter(). Los registros no guardan texto: la
+# línea del panel se formatea al mostrarla (ver format_event). code es i4
+# para que quepan las teclas de pygame 2 (p. ej. K_UP = 0x40000052).
+EVENT_DTYPE = np.dtype([
+    ("t", "f8"),
+    ("kind", "u1"),
+    ("code", "i4"),
+    ("value", "f4"),
+])
+
+
+def pack_hat(x, y):
+    """Codifica un valor de hat (x, y) con x, y en -1..1 como 0..8."""
+    return (x + 1) * 3 + (y + 1)
+
+
+def unpack_hat(value):
+    v = int(value)
+    return v // 3 - 1, v % 3 - 1
+
+
+def raw_packet(record):
+    """Paquete RAW simplificado (bytes) de un registro HID."""
+    kind = int(record["kind"])
+    code = int(record["code"])
+    if kind == KIND_AXIS:
+        q = int(max(-127, min(127, float(record["value"]) * 127)))
+        return bytes([KIND_AXIS, code & 0xFF, q & 0xFF])
+    if kind == KIND_HAT:
+        hx, hy = unpack_hat(record["value"])
+        return bytes([KIND_HAT, hx & 0xFF, hy & 0xFF])
+    return bytes([kind, code & 0xFF])
+
+
+class RingBuffer:
+    """Buffer circular de capacidad fija sobre un array estructurado.
+
+    El array tiene el doble de la capacidad y cada registro se escribe en
+    i y en i + capacity: así las últimas n entradas (n <= capacity) son
+    siempre un tramo contiguo y last(n) devuelve una vista sin copiar.
+    """
+
+    def __init__(self, capacity, dtype=EVENT_DTYPE):
+        self.capacity = capacity
+        self.data = np.zeros(2 * capacity, dtype)
+        self.total = 0      # registros añadidos desde el principio (no se reinicia)
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def append(self, *record):
+        i = self.total % self.capacity
+        self.data[i] = record
+        self.data[i + self.capacity] = record
+        self.total += 1
+
+    def last(self, n, since=0, until=None):
+        """Vista de las últimas n entradas con índice >= since, de la más antigua a la más reciente.
+
+        until: sólo entradas con índice < until (las últimas "en ese momento");
+        las ya sobrescritas no se devuelven.
+        """
+        total = self.total if until is None else min(until, self.total)
+        n = max(0, min(n, self.capacity - (self.total - total), total - since))
+        end = (total - 1) % self.capacity + self.capacity + 1
+        return self.data[end - n:end]
+
+    def clear(self):
+        self.total = 0
+
+
+class EventRing(RingBuffer):
+    """RingBuffer de EVENT_DTYPE que además cuenta los registros por tipo."""
+
+    def __init__(self, capacity):
+        super().__init__(capacity, EVENT_DTYPE)
+        self.kind_counts = [0] * 256
+
+    def append(self, t, kind, code=0, value=0.0):
+        # Igual que RingBuffer.append, en línea por ser el camino de cada evento
+        cap = self.capacity
+        i = self.total % cap
+        record = (t, kind, code, value)
+        data = self.data
+        data[i] = record
+        data[i + cap] = record
+        self.total += 1
+        self.kind_counts[kind] += 1
+
+    def clear(self):
+        super().clear()
+        self.kind_counts = [0] * 256
+
+
+class EventLogView:
+    """Vista del registro para el panel de eventos.
+
+    clear() sólo marca hasta dónde se ha borrado; los registros siguen en
+    el buffer para los paquetes RAW y para exportar. Con until (total del
+    buffer en un momento anterior) la vista muestra el registro tal como
+    estaba entonces; None es el presente.
+    """
+
+    def __init__(self, ring):
+        self.ring = ring
+        self.mark = 0
+        self.until = None
+
+    def __len__(self):
+        total = self.ring.total if self.until is None else self.until
+        return max(0, min(total - self.mark, self.ring.capacity))
+
+    def last(self, n):
+        """Vista de los últimos n registros desde el último clear()."""
+        return self.ring.last(n, self.mark, self.until)
+
+    def clear(self):
+        self.mark = self.ring.total
+
+
+class RawSignalsView:
+    """Vista de paquetes RAW: sólo los registros HID del buffer.
+
+    until: como en EventLogView, para ver el buffer en un momento anterior.
+    """
+
+    def __init__(self, ring, scan=256):
+        self.ring = ring
+        self.scan = scan    # registros recientes en los que buscar
+        self.until = None
+
+    def __len__(self):
+        """Registros HID añadidos desde el principio (hasta until)."""
+        count = sum(self.ring.kind_counts[k] for k in HID_KINDS)
+        if self.until is not None and self.until < self.ring.total:
+            newer = self.ring.last(self.ring.total - self.until)
+            count -= int(np.count_nonzero(np.isin(newer["kind"], HID_KINDS)))
+        return count
+
+    def last(self, n):
+        """Últimos n registros HID (copia pequeña, ya filtrada)."""
+        recent = self.ring.last(self.scan, until=self.until)
+        return recent[np.isin(recent["kind"], HID_KINDS)][-n:]
+
+    def packets(self, n):
+        return [raw_packet(rec) for rec in self.last(n)]
+
+
+class AxisCoalescer:
+    """Agrupa por frame los eventos JOYAXISMOTION.
+
+    add() sólo guarda el último valor de cada eje (y el mínimo, el máximo y
+    cuántos eventos llegaron en el frame); drain() devuelve una vez por
+    frame los ejes que se movieron, para aplicar deadzone y umbral una
+    sola vez por eje. stats() resume los totales y, por eje, el rango del
+    último frame con eventos y el mayor rango visto dentro de un frame.
+    """
+
+    def __init__(self, n_axes=8):
+        self.latest = [0.0] * n_axes
+        self.min = [0.0] * n_axes     # rango del último frame con eventos
+        self.max = [0.0] * n_axes
+        self.spread = [0.0] * n_axes  # mayor max - min dentro de un frame
+        self.count = [0] * n_axes     # eventos del frame en curso
+        self.pending = []             # ejes con eventos en el frame, en orden de llegada
+        self.frame_events = 0         # eventos del último frame drenado
+        self.frame_axes = 0           # ejes procesados en el último frame drenado
+        self.events_total = 0
+        self.processed_total = 0
+
+    def add(self, axis, value):
+        if axis >= len(self.latest):
+            extra = axis + 1 - len(self.latest)
+            for arr, fill in ((self.latest, 0.0), (self.min, 0.0), (self.max, 0.0),
+                              (self.spread, 0.0), (self.count, 0)):
+                arr.extend([fill] * extra)
+        if self.count[axis] == 0:
+            self.pending.append(axis)
+            self.min[axis] = self.max[axis] = value
+        elif value < self.min[axis]:
+            self.min[axis] = value
+        elif value > self.max[axis]:
+            self.max[axis] = value
+        self.latest[axis] = value
+        self.count[axis] += 1
+
+    def drain(self):
+        """Lista de (eje, último valor) del frame; reinicia el frame."""
+        pending = self.pending
+        out = [(axis, self.latest[axis]) for axis in pending]
+        events = 0
+        for axis in pending:
+            events += self.count[axis]
+            self.count[axis] = 0
+            spread = self.max[axis] - self.min[axis]
+            if spread > self.spread[axis]:
+                self.spread[axis] = spread
+        self.pending = []
+        self.frame_events = events
+        self.frame_axes = len(out)
+        self.events_total += events
+        self.processed_total += len(out)
+        return out
+
+    def stats(self):
+        ratio = self.events_total / self.processed_total if self.processed_total else 0.0
+        lines = [f"AxisCoalescer: {self.events_total} eventos de eje -> "
+                 f"{self.processed_total} procesados ({ratio:.1f} eventos por eje y frame)"]
+        lines.extend(
+            f"  eje {axis}: último frame [{self.min[axis]:+.2f}, {self.max[axis]:+.2f}], "
+            f"mayor rango en un frame {self.spread[axis]:.2f}"
+            for axis in range(len(self.latest)) if self.spread[axis] > 0
+        )
+        return "\n".join(lines)
+
+
+class ControllerState:
+    """Estado del mando: ejes en arrays NumPy, botones en una máscara de bits.
+
+    Los eventos escriben el valor crudo (set_axis / set_button / set_hat).
+    update(), una vez por frame, calcula todos los ejes procesados en una
+    operación: deadzone radial para cada pareja de ejes de un stick
+    (axial para los sueltos, p. ej. gatillos) y curva de respuesta
+    tabulada en lut. También fija los flancos del frame (botones que se
+    pulsaron o soltaron desde el update() anterior) para just_pressed() /
+    just_released().
+    """
+
+    def __init__(self, n_axes=0, stick_pairs=((0, 1), (2, 3)), deadzone=0.28, curve=1.0, lut_size=1024):
+        self.n_axes = n_axes
+        self.raw = np.zeros(n_axes, np.float32)
+        self.axes = np.zeros(n_axes, np.float32)      # tras deadzone y curva
+        self.prev_axes = np.zeros(n_axes, np.float32)
+        self.deadzone = deadzone
+        self.lut_size = lut_size
+        # partner[i]: el otro eje del stick de i (o i mismo si es un eje suelto)
+        self.partner = np.arange(n_axes)
+        for x, y in stick_pairs:
+            if x < n_axes and y < n_axes:
+                self.partner[x], self.partner[y] = y, x
+        self.paired = self.partner != np.arange(n_axes)
+        self.buttons = 0          # bit i = botón i pulsado
+        self.prev_buttons = 0     # botones en el update() anterior
+        self._down = 0            # flancos del último update()
+        self._up = 0
+        self.hats = {}
+        self.set_curve(curve)
+
+    # ----------------- CONFIGURACIÓN -----------------
+    def set_curve(self, curve):
+        """Curva de respuesta: exponente (1 = lineal, 2 = cuadrática) o función de 0..1 en 0..1."""
+        x = np.linspace(0.0, 1.0, self.lut_size, dtype=np.float32)
+        self.lut = np.clip(curve(x) if callable(curve) else x ** curve, 0.0, 1.0).astype(np.float32)
+
+    # ----------------- ENTRADAS -----------------
+    def set_axis(self, axis, value):
+        if axis < self.n_axes:
+            self.raw[axis] = value
+
+    def set_button(self, button, down):
+        bit = 1 << button
+        if down:
+            self.buttons |= bit
+        else:
+            self.buttons &= ~bit
+
+    def set_hat(self, hat, value):
+        """Guarda el valor del hat y devuelve el anterior."""
+        prev = self.hats.get(hat, (0, 0))
+        self.hats[hat] = value
+        return prev
+
+    def reset(self):
+        self.raw[:] = 0.0
+        self.axes[:] = 0.0
+        self.prev_axes[:] = 0.0
+        self.buttons = self.prev_buttons = self._down = self._up = 0
+        self.hats.clear()
+
+    # ----------------- FRAME -----------------
+    def update(self):
+        """Procesa todos los ejes y fija los flancos de los botones (una vez por frame)."""
+        self.prev_axes[:] = self.axes
+        raw = self.raw
+        # Magnitud: |v| para ejes sueltos, longitud del vector para cada stick
+        mag = np.where(self.paired, np.hypot(raw, raw[self.partner]), np.abs(raw))
+        # Reescala (deadzone..1) -> (0..1), aplica la curva y conserva la dirección
+        dz = self.deadzone
+        t = np.clip((mag - dz) / (1.0 - dz), 0.0, 1.0)
+        curved = self.lut[(t * (self.lut_size - 1)).astype(np.intp)]
+        np.divide(raw * curved, mag, out=self.axes, where=mag > dz)
+        self.axes[mag <= dz] = 0.0
+        np.clip(self.axes, -1.0, 1.0, out=self.axes)
+
+        buttons, prev = self.buttons, self.prev_buttons
+        self._down = buttons & ~prev
+        self._up = prev & ~buttons
+        self.prev_buttons = buttons
+
+    def process_value(self, axis, value, partner_value=0.0):
+        """Versión escalar de update() para un valor suelto del eje.
+
+        partner_value es el otro eje del stick (si axis forma pareja).
+        Sirve para procesar muestras sin tocar el estado del frame.
+        """
+        mag = math.hypot(value, partner_value) if self.paired[axis] else abs(value)
+        dz = self.deadzone
+        if mag <= dz:
+            return 0.0
+        t = min(1.0, (mag - dz) / (1.0 - dz))
+        curved = float(self.lut[int(t * (self.lut_size - 1))])
+        return max(-1.0, min(1.0, value * curved / mag))
+
+    # ----------------- CONSULTAS -----------------
+    def axis(self, axis):
+        """Valor procesado (deadzone + curva) del eje, 0.0 si no existe."""
+        return float(self.axes[axis]) if axis < self.n_axes else 0.0
+
+    def raw_axis(self, axis):
+        return float(self.raw[axis]) if axis < self.n_axes else 0.0
+
+    def pressed(self, button):
+        return bool(self.buttons >> button & 1)
+
+    def just_pressed(self, button):
+        """True si el botón pasó a pulsado en el último update()."""
+        return bool(self._down >> button & 1)
+
+    def just_released(self, button):
+        """True si el botón pasó a suelto en el último update()."""
+        return bool(self._up >> button & 1)
+
+    def pressed_buttons(self):
+        mask = self.buttons
+        return [i for i in range(mask.bit_length()) if mask >> i & 1]
+
+
+class InputSampler:
+    """Muestreo del joystick en un hilo propio a frecuencia fija (p. ej. 1000 Hz).
+
+    Cada cambio de eje, botón o hat se encola como (t, kind, code, value),
+    con t de time.perf_counter() y el mismo formato que los registros de
+    EventRing (botones: value 1.0 al pulsar, 0.0 al soltar). La cola es
+    una deque acotada (append / popleft son atómicos); si el consumidor
+    no la vacía se pierden las muestras más antiguas.
+
+    Ojo: SDL sólo actualiza el estado del joystick al procesar eventos
+    (SDL_PumpEvents en el hilo principal) salvo que el backend tenga hilo
+    propio (hint SDL_JOYSTICK_THREAD=1, RawInput en Windows). Sin él, el
+    hilo ve los cambios a la frecuencia del bucle principal, aunque con
+    orden y marcas de tiempo más finas que un frame.
+    """
+
+    def __init__(self, joystick, rate_hz=1000, maxlen=8192):
+        self.joystick = joystick
+        self.rate_hz = rate_hz
+        self.queue = deque(maxlen=maxlen)
+        self.polls = 0            # lecturas del joystick
+        self.samples = 0          # cambios encolados
+        self.elapsed = 0.0        # segundos de hilo en marcha (hasta stop())
+        self._started = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="InputSampler", daemon=True)
+            self._started = time.perf_counter()
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+            self.elapsed += time.perf_counter() - self._started
+            self._started = None
+
+    def stats(self):
+        elapsed = self.elapsed
+        if self._started is not None:
+            elapsed += time.perf_counter() - self._started
+        rate = self.polls / elapsed if elapsed > 0 else 0.0
+        return (f"InputSampler: {self.polls} lecturas ({rate:,.0f} Hz reales de {self.rate_hz} Hz), "
+                f"{self.samples} cambios encolados")
+
+    def _run(self):
+        js = self.joystick
+        push = self.queue.append
+        axes = [js.get_axis(i) for i in range(js.get_numaxes())]
+        buttons = [js.get_button(i) for i in range(js.get_numbuttons())]
+        hats = [js.get_hat(i) for i in range(js.get_numhats())]
+        period = 1.0 / self.rate_hz
+        next_t = time.perf_counter()
+        while not self._stop.is_set():
+            t = time.perf_counter()
+            for i, prev in enumerate(axes):
+                v = js.get_axis(i)
+                if v != prev:
+                    axes[i] = v
+                    push((t, KIND_AXIS, i, v))
+                    self.samples += 1
+            for i, prev in enumerate(buttons):
+                v = js.get_button(i)
+                if v != prev:
+                    buttons[i] = v
+                    push((t, KIND_BUTTON, i, 1.0 if v else 0.0))
+                    self.samples += 1
+            for i, prev in enumerate(hats):
+                v = js.get_hat(i)
+                if v != prev:
+                    hats[i] = v
+                    push((t, KIND_HAT, i, pack_hat(*v)))
+                    self.samples += 1
+            self.polls += 1
+            next_t += period
+            delay = next_t - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_t = time.perf_counter()   # vamos tarde: no acumular retraso
+
+    def drain(self, until=None):
+        """Saca en orden las muestras con t <= until (todas si until es None)."""
+        q = self.queue
+        out = []
+        while q and (until is None or q[0][0] <= until):
+            out.append(q.popleft())
+        return out
+
+    def clear(self):
+        self.queue.clear()
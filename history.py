@@ -0,0 +1,273 @@
+"""
+Historial en memoria de los últimos ticks de la partida (viaje en el tiempo).
+
+Cada tick guarda sólo lo que cambió respecto al anterior, como operaciones
+en un bytearray: en un movimiento basta la celda de la nueva cabeza (la
+cola que sale es la última del cuerpo); la comida, los escalares (vidas,
+puntuación, velocidad, dirección...) y el estado HID sólo se guardan
+cuando cambian. Cada keyframe_every ticks empieza un bloque con el estado
+completo y los bloques más antiguos se descartan, así que el historial
+ocupa unos pocos KiB.
+
+state(tick) reconstruye un TickState desde el keyframe de su bloque; se
+dibuja como un SnakeEngine (mismos atributos).
+"""
+import struct
+from array import array
+from collections import deque
+
+import numpy as np
+
+from snake_engine import UP, RIGHT, DOWN, LEFT, LOGIC_STEP_MS, MOVED, ATE, RESPAWNED
+
+DIRS = (UP, RIGHT, DOWN, LEFT)
+DIR_INDEX = {d: i for i, d in enumerate(DIRS)}
+
+# Operaciones (1 byte) y sus datos
+OP_MOVE = 1     # celda u32 de la nueva cabeza; sale la cola
+OP_GROW = 2     # celda u32 de la nueva cabeza; la cola se queda (comió)
+OP_BODY = 3     # n u32 + n celdas u32: cuerpo completo (reaparición)
+OP_FOOD = 4     # n u8 + n celdas u32: comida completa
+OP_STATE = 5    # STATE
+OP_HID = 6      # HID
+OP_CTRL = 7     # botones u32 + ejes crudos f32 + ejes procesados f32
+
+CELL = struct.Struct("<I")
+COUNT = struct.Struct("<I")
+# lives, score, speed, dirección, siguiente dirección, flags, death_ms
+STATE = struct.Struct("<iqdBBBd")
+# total del buffer HID y marca del log de eventos
+HID = struct.Struct("<QQ")
+
+
+class TickState:
+    """Estado de la partida en un tick del historial (sólo para dibujar)."""
+
+    def __init__(self, n_axes):
+        self.ticks = 0
+        self.snake = deque()
+        self.foods = []
+        self.lives = 0
+        self.score = 0
+        self.speed = 0.0
+        self.direction = RIGHT
+        self.next_direction = RIGHT
+        self.dead = False
+        self.game_over = False
+        self.finished = False
+        self.death_ms = 0.0
+        self.hid_total = 0
+        self.hid_mark = 0
+        self.buttons = 0
+        self.raw = np.zeros(n_axes, np.float32)
+        self.axes = np.zeros(n_axes, np.float32)
+
+    @property
+    def head(self):
+        return self.snake[0]
+
+    def __len__(self):
+        return len(self.snake)
+
+
+class _Block:
+    """keyframe_every ticks: estado completo del primero y deltas del resto."""
+
+    def __init__(self, start, keyframe):
+        self.start = start            # tick del keyframe
+        self.keyframe = keyframe      # operaciones que reconstruyen el estado completo
+        self.ops = bytearray()
+        self.ends = array("I")        # fin de las operaciones de cada tick siguiente
+
+    def nbytes(self):
+        return len(self.keyframe) + len(self.ops) + self.ends.itemsize * len(self.ends)
+
+
+class TickHistory:
+    """Últimos `capacity` ticks de una partida, codificados en deltas.
+
+    - note_input(hid_total, hid_mark, controller): estado HID del frame
+    - record(engine, result): tras cada engine.tick()
+    - state(tick): TickState de un tick entre first_tick y last_tick
+    """
+
+    def __init__(self, capacity=4096, keyframe_every=256, n_axes=0):
+        self.keyframe_every = keyframe_every
+        self.n_axes = n_axes
+        self.grid_w = 0
+        self.blocks = deque(maxlen=capacity // keyframe_every + 1)
+        self._scalars = None
+        self._hid = None
+        self._ctrl = None
+        self._pending = bytearray()     # HID / mando pendientes del próximo tick
+
+    def clear(self):
+        self.blocks.clear()
+        self._scalars = self._hid = self._ctrl = None
+        self._pending.clear()
+
+    @property
+    def first_tick(self):
+        return self.blocks[0].start if self.blocks else None
+
+    @property
+    def last_tick(self):
+        if not self.blocks:
+            return None
+        block = self.blocks[-1]
+        return block.start + len(block.ends)
+
+    def __len__(self):
+        return 0 if not self.blocks else self.last_tick - self.first_tick + 1
+
+    def nbytes(self):
+        """Memoria de los datos guardados (bytes)."""
+        return sum(block.nbytes() for block in self.blocks)
+
+    # ----------------- GRABACIÓN -----------------
+    def note_input(self, hid_total, hid_mark, controller):
+        """Estado HID del frame; se guarda en el próximo tick si cambió."""
+        hid = (hid_total, hid_mark)
+        if hid != self._hid:
+            self._hid = hid
+            self._pending.append(OP_HID)
+            self._pending += HID.pack(*hid)
+        ctrl = COUNT.pack(controller.buttons) + controller.raw.tobytes() + controller.axes.tobytes()
+        if ctrl != self._ctrl:
+            self._ctrl = ctrl
+            self._pending.append(OP_CTRL)
+            self._pending += ctrl
+
+    def record(self, engine, result):
+        """Guarda el tick que acaba de simular engine (result: lo que devolvió tick())."""
+        block = self.blocks[-1] if self.blocks else None
+        if block is None or engine.ticks != block.start + len(block.ends) + 1:
+            # Primer tick o salto (no consecutivo): empezar con un keyframe
+            self._new_block(engine)
+            return
+        if len(block.ends) + 1 >= self.keyframe_every:
+            self._new_block(engine)
+            return
+        ops = block.ops
+        if result == MOVED or result == ATE:
+            x, y = engine.snake[0]
+            ops.append(OP_MOVE if result == MOVED else OP_GROW)
+            ops += CELL.pack(y * engine.grid_w + x)
+        elif result == RESPAWNED:
+            self._pack_body(engine, ops)
+        if result == ATE or result == RESPAWNED:
+            self._pack_foods(engine, ops)
+        scalars = self._scalar_values(engine)
+        if scalars != self._scalars:
+            self._scalars = scalars
+            ops.append(OP_STATE)
+            ops += STATE.pack(*scalars, engine.death_ms)
+        if self._pending:
+            ops += self._pending
+            self._pending.clear()
+        block.ends.append(len(ops))
+
+    def _new_block(self, engine):
+        self.grid_w = engine.grid_w
+        ops = bytearray()
+        self._pack_body(engine, ops)
+        self._pack_foods(engine, ops)
+        self._scalars = self._scalar_values(engine)
+        ops.append(OP_STATE)
+        ops += STATE.pack(*self._scalars, engine.death_ms)
+        if self._hid is not None:
+            ops.append(OP_HID)
+            ops += HID.pack(*self._hid)
+        if self._ctrl is not None:
+            ops.append(OP_CTRL)
+            ops += self._ctrl
+        self._pending.clear()
+        self.blocks.append(_Block(engine.ticks, bytes(ops)))
+
+    @staticmethod
+    def _scalar_values(engine):
+        flags = engine.dead | engine.game_over << 1 | engine.finished << 2
+        return (engine.lives, engine.score, engine.speed, DIR_INDEX[engine.direction],
+                DIR_INDEX[engine.next_direction], flags)
+
+    @staticmethod
+    def _pack_body(engine, ops):
+        w = engine.grid_w
+        ops.append(OP_BODY)
+        ops += COUNT.pack(len(engine.snake))
+        ops += array("I", [y * w + x for x, y in engine.snake]).tobytes()
+
+    @staticmethod
+    def _pack_foods(engine, ops):
+        w = engine.grid_w
+        ops.append(OP_FOOD)
+        ops.append(len(engine.foods))
+        ops += array("I", [y * w + x for x, y in engine.foods]).tobytes()
+
+    # ----------------- RECONSTRUCCIÓN -----------------
+    def state(self, tick):
+        """TickState del tick (limitado al rango guardado); None si está vacío."""
+        if not self.blocks:
+            return None
+        tick = max(self.first_tick, min(tick, self.last_tick))
+        block = next(b for b in reversed(self.blocks) if b.start <= tick)
+        grid_w = self.grid_w
+        state = TickState(self.n_axes)
+        state.ticks = block.start
+        self._apply(state, block.keyframe, grid_w)
+        start = 0
+        for end in block.ends[:tick - block.start]:
+            # Lo que tick() hace por sí solo: contar el tick y la espera de muerte
+            state.ticks += 1
+            if (state.dead or state.game_over) and not state.finished:
+                state.death_ms += LOGIC_STEP_MS
+            self._apply(state, memoryview(block.ops)[start:end], grid_w)
+            start = end
+        return state
+
+    def _apply(self, state, ops, grid_w):
+        pos = 0
+        end = len(ops)
+        n_axes = self.n_axes
+        while pos < end:
+            op = ops[pos]
+            pos += 1
+            if op == OP_MOVE or op == OP_GROW:
+                cell = CELL.unpack_from(ops, pos)[0]
+                pos += CELL.size
+                state.snake.appendleft((cell % grid_w, cell // grid_w))
+                if op == OP_MOVE:
+                    state.snake.pop()
+            elif op == OP_BODY:
+                n = COUNT.unpack_from(ops, pos)[0]
+                pos += COUNT.size
+                cells = array("I", bytes(ops[pos:pos + 4 * n]))
+                pos += 4 * n
+                state.snake = deque((c % grid_w, c // grid_w) for c in cells)
+            elif op == OP_FOOD:
+                n = ops[pos]
+                pos += 1
+                cells = array("I", bytes(ops[pos:pos + 4 * n]))
+                pos += 4 * n
+                state.foods = [(c % grid_w, c // grid_w) for c in cells]
+            elif op == OP_STATE:
+                (state.lives, state.score, state.speed, d, nd, flags,
+                 state.death_ms) = STATE.unpack_from(ops, pos)
+                pos += STATE.size
+                state.direction = DIRS[d]
+                state.next_direction = DIRS[nd]
+                state.dead = bool(flags & 1)
+                state.game_over = bool(flags & 2)
+                state.finished = bool(flags & 4)
+            elif op == OP_HID:
+                state.hid_total, state.hid_mark = HID.unpack_from(ops, pos)
+                pos += HID.size
+            elif op == OP_CTRL:
+                state.buttons = COUNT.unpack_from(ops, pos)[0]
+                pos += COUNT.size
+                state.raw = np.frombuffer(bytes(ops[pos:pos + 4 * n_axes]), np.float32)
+                pos += 4 * n_axes
+                state.axes = np.frombuffer(bytes(ops[pos:pos + 4 * n_axes]), np.float32)
+                pos += 4 * n_axes
+            else:
+                raise ValueError(f"operación de historial desconocida: {op}")
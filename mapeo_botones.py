@@ -1,6 +1,8 @@
 import pygame
 import sys
 
+from render_cache import TextCache
+
 # Inicializar Pygame
 pygame.init()
 pygame.joystick.init()
@@ -11,6 +13,7 @@ pygame.display.set_caption("Mapeo de Botones PS5 - Presiona los botones del D-Pa
 clock = pygame.time.Clock()
 font = pygame.font.SysFont("Consolas", 24, bold=True)
 big_font = pygame.font.SysFont("Consolas", 32, bold=True)
+text_cache = TextCache()
 
 # Detectar control
 if pygame.joystick.get_count() > 0:
@@ -56,14 +59,14 @@ while running:
     screen.fill((10, 10, 20))
     
     # Título
-    title = big_font.render("MAPEO DE BOTONES PS5", True, (255, 255, 0))
+    title = text_cache.render(big_font, "MAPEO DE BOTONES PS5", (255, 255, 0))
     screen.blit(title, (150, 50))
     
     # Instrucciones
-    inst1 = font.render("Presiona los botones del D-Pad (arriba, abajo, izquierda, derecha)", True, (200, 200, 200))
+    inst1 = text_cache.render(font, "Presiona los botones del D-Pad (arriba, abajo, izquierda, derecha)", (200, 200, 200))
     screen.blit(inst1, (50, 150))
     
-    inst2 = font.render("También presiona X, Circle, Square, Triangle para verificar", True, (200, 200, 200))
+    inst2 = text_cache.render(font, "También presiona X, Circle, Square, Triangle para verificar", (200, 200, 200))
     screen.blit(inst2, (50, 200))
     
     # Estado actual del D-Pad
@@ -78,27 +81,27 @@ while running:
             hat_text += " (IZQUIERDA)"
         elif hat_x == 1:
             hat_text += " (DERECHA)"
-        hat_display = font.render(hat_text, True, (100, 255, 100))
+        hat_display = text_cache.render(font, hat_text, (100, 255, 100))
         screen.blit(hat_display, (50, 280))
     
     # Botones presionados
     buttons_text = f"Botones presionados: {list(buttons_pressed.keys())}"
-    buttons_display = font.render(buttons_text, True, (100, 150, 255))
+    buttons_display = text_cache.render(font, buttons_text, (100, 150, 255))
     screen.blit(buttons_display, (50, 330))
     
     # Log de eventos
     log_y = 400
-    log_title = font.render("Últimos eventos:", True, (255, 200, 100))
+    log_title = text_cache.render(font, "Últimos eventos:", (255, 200, 100))
     screen.blit(log_title, (50, log_y))
     
     log_y += 40
     for line in button_log[-8:]:
-        log_text = font.render(line, True, (200, 200, 200))
+        log_text = text_cache.render(font, line, (200, 200, 200))
         screen.blit(log_text, (70, log_y))
         log_y += 30
     
     # Info para salir
-    exit_text = font.render("Presiona ESC o cierra la ventana para salir", True, (150, 150, 150))
+    exit_text = text_cache.render(font, "Presiona ESC o cierra la ventana para salir", (150, 150, 150))
     screen.blit(exit_text, (50, 580))
     
     # Evento de teclado para salir
@@ -110,6 +113,7 @@ while running:
     clock.tick(60)
 
 pygame.quit()
+print(text_cache.stats())
 print("\nResumen:")
 print("Si ves 'D-Pad: (0, -1)' cuando presionas ARRIBA -> D-Pad está funcionando correctamente")
 print("Si ves números de botones para el D-Pad -> necesitamos mapear esos botones en el código")
@@ -0,0 +1,123 @@
+"""
+Sistema de partículas con NumPy.
+
+Las partículas viven en arrays paralelos (struct-of-arrays) de capacidad
+fija: la integración y el descarte de las muertas son operaciones
+vectorizadas, y el dibujo es un único surface.blits() de sprites de
+círculo pre-renderizados con la transparencia cuantizada en escalones.
+"""
+import numpy as np
+import pygame
+import pygame.gfxdraw
+
+from render_cache import to_display_format
+
+
+class ParticlePool:
+    """Partículas en arrays NumPy: x, y, vx, vy, life, maxlife, size y color.
+
+    - emit(x, y, n, ...): añade n partículas en (x, y) con velocidad aleatoria
+    - update(): avanza un frame (movimiento, rozamiento, vida) y descarta las muertas
+    - draw(surface): las dibuja con un solo blits() y devuelve los rects
+
+    Las partículas vivas ocupan siempre los índices 0..count-1. Si el pool
+    está lleno, las nuevas partículas que no caben se descartan.
+    """
+
+    def __init__(self, capacity=4096, palette=((255, 170, 60),), max_size=5, alpha_steps=16, drag=0.96, seed=None):
+        self.capacity = capacity
+        self.palette = tuple(tuple(c) for c in palette)
+        self.max_size = max_size
+        self.alpha_steps = alpha_steps
+        self.drag = drag
+        self.rng = np.random.default_rng(seed)
+        self.count = 0
+        self.x = np.zeros(capacity, np.float32)
+        self.y = np.zeros(capacity, np.float32)
+        self.vx = np.zeros(capacity, np.float32)
+        self.vy = np.zeros(capacity, np.float32)
+        self.life = np.zeros(capacity, np.int32)
+        self.maxlife = np.ones(capacity, np.int32)
+        self.size = np.zeros(capacity, np.int16)
+        self.color = np.zeros(capacity, np.uint8)   # índice en palette
+        self._sprites = None
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    # ----------------- EMISIÓN -----------------
+    def emit(self, x, y, n, speed=2.5, life=(18, 36), maxlife=36, size=(2, 5), color=0):
+        """Añade hasta n partículas en (x, y); devuelve cuántas se añadieron.
+
+        vx, vy ~ uniforme(-speed, speed); life y size son rangos cerrados.
+        """
+        n = min(n, self.capacity - self.count)
+        if n <= 0:
+            return 0
+        s = slice(self.count, self.count + n)
+        rng = self.rng
+        self.x[s] = x
+        self.y[s] = y
+        self.vx[s] = rng.uniform(-speed, speed, n)
+        self.vy[s] = rng.uniform(-speed, speed, n)
+        self.life[s] = rng.integers(life[0], life[1], n, endpoint=True)
+        self.maxlife[s] = maxlife
+        self.size[s] = rng.integers(size[0], min(size[1], self.max_size), n, endpoint=True)
+        self.color[s] = color
+        self.count += n
+        return n
+
+    # ----------------- SIMULACIÓN -----------------
+    def update(self):
+        """Avanza un frame y compacta las partículas vivas al principio."""
+        n = self.count
+        if n == 0:
+            return
+        x, y, vx, vy, life = self.x[:n], self.y[:n], self.vx[:n], self.vy[:n], self.life[:n]
+        x += vx
+        y += vy
+        vx *= self.drag
+        vy *= self.drag
+        life -= 1
+        alive = life > 0
+        k = int(np.count_nonzero(alive))
+        if k == n:
+            return
+        for arr in (self.x, self.y, self.vx, self.vy, self.life, self.maxlife, self.size, self.color):
+            arr[:k] = arr[:n][alive]
+        self.count = k
+
+    # ----------------- DIBUJO -----------------
+    def sprites(self):
+        """Sprites de círculo por (color, tamaño, escalón de alfa), en una lista plana."""
+        if self._sprites is None:
+            sprites = []
+            for clr in self.palette:
+                for size in range(self.max_size + 1):
+                    for step in range(self.alpha_steps):
+                        alpha = 255 * (step + 1) // self.alpha_steps
+                        surf = pygame.Surface((max(1, size * 2), max(1, size * 2)), pygame.SRCALPHA)
+                        if size > 0:
+                            pygame.gfxdraw.filled_circle(surf, size, size, size, (*clr, alpha))
+                        sprites.append(to_display_format(surf, alpha=True))
+            self._sprites = sprites
+        return self._sprites
+
+    def draw(self, surface):
+        """Dibuja las partículas vivas con un único blits(); devuelve sus rects."""
+        n = self.count
+        if n == 0:
+            return []
+        sprites = self.sprites()
+        steps = self.alpha_steps
+        size = self.size[:n].astype(np.int32)
+        # Alfa proporcional a la vida restante, cuantizado a alpha_steps escalones
+        alpha = (255 * self.life[:n].astype(np.int64)) // self.maxlife[:n]
+        step = np.clip(alpha * steps // 256, 0, steps - 1)
+        idx = (self.color[:n].astype(np.int32) * (self.max_size + 1) + size) * steps + step
+        px = (self.x[:n] - size).astype(np.int32)
+        py = (self.y[:n] - size).astype(np.int32)
+        return surface.blits([(sprites[i], (sx, sy)) for i, sx, sy in zip(idx.tolist(), px.tolist(), py.tolist())])
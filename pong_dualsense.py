@@ -1,8 +1,58 @@
 import pygame
+import os
 import sys
+import math
+import struct
+import time
+from itertools import chain
 import pygame.gfxdraw
+import numpy as np
+
+from hid_input import (
+    AxisCoalescer, ControllerState, EventRing, EventLogView, RawSignalsView, InputSampler,
+    KIND_AXIS, KIND_BUTTON, KIND_HAT, KIND_SPEED, KIND_LIFE, KIND_KEY, pack_hat, unpack_hat,
+)
+from history import TickHistory
+from particles import ParticlePool
+from profiler import FrameProfiler
+from render_cache import LayerCache, DirtyRects, GpuPresenter, TextCache, GlyphAtlas
+from replay import SessionRecorder, SessionReader, ReplayFeed
+from snake_engine import (
+    SnakeEngine, FixedTimestep, GRID_SIZE, UP, DOWN, LEFT, RIGHT, DIED, GAME_OVER, ATE,
+    RESPAWNED, FINISHED, SPEED_STEP, LOGIC_STEP_MS,
+)
 
 # ----------------- INICIALIZACIÓN -----------------
+def cli_option(name, default=None):
+    """Valor que sigue a name en la línea de comandos (default si no está)."""
+    if name in sys.argv:
+        i = sys.argv.index(name)
+        if i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+    return default
+
+# Grabar cada partida (--record <archivo> o SNAKE_RECORD) o reproducir una
+# grabación (--replay <archivo>) en lugar de jugar
+RECORD_PATH = cli_option("--record", os.environ.get("SNAKE_RECORD"))
+REPLAY_PATH = cli_option("--replay")
+KEYFRAME_TICKS = 1000   # keyframe de estado en la grabación cada 5 s simulados
+SCRUB_TICKS = 200       # salto de ←/→ en la pausa al reproducir (1 s; x10 con Shift)
+HISTORY_TICKS = 4096    # ticks recientes que guarda el historial (~20 s)
+
+# Profiler de etapas del frame: F3 muestra / oculta el overlay (y mide sólo
+# mientras está visible), F4 exporta el trace a TRACE_PATH. --profile o
+# SNAKE_PROFILE=1 lo activan desde el inicio.
+PROFILE = "--profile" in sys.argv or os.environ.get("SNAKE_PROFILE") == "1"
+TRACE_PATH = cli_option("--trace", "snake_trace.json")
+
+# Muestreo del mando en un hilo aparte (--input-thread o SNAKE_INPUT_HZ=<Hz>).
+# Con él, los giros se aplican en el tick lógico que corresponde a la marca
+# de tiempo de cada muestra en lugar de una vez por frame.
+INPUT_SAMPLE_HZ = int(os.environ.get("SNAKE_INPUT_HZ", "1000" if "--input-thread" in sys.argv else "0"))
+if INPUT_SAMPLE_HZ > 0:
+    # Que SDL lea el joystick en su propio hilo (si el backend lo soporta)
+    os.environ.setdefault("SDL_JOYSTICK_THREAD", "1")
+
 pygame.init()
 pygame.joystick.init()
 pygame.mixer.init()
@@ -16,20 +66,63 @@ if use_controller:
 else:
     print("No hay control PS5, funcionará con teclado (2P con flechas).")
 
+input_sampler = None
+if use_controller and INPUT_SAMPLE_HZ > 0:
+    input_sampler = InputSampler(joystick, INPUT_SAMPLE_HZ).start()
+
+def quit_pygame():
+    """pygame.quit(), tras parar el hilo de muestreo (lee el joystick que cierra)."""
+    if input_sampler is not None:
+        input_sampler.stop()
+    pygame.quit()
+
 # ----------------- LAYOUT GENERAL -----------------
 GAME_W, GAME_H = 600, 600          # área de juego (cuadrado para Snake)
 LEFT_PANEL_W = 280                 # panel de kernel / HID (reducido)
 FOOTER_H = 200                     # espacio para el DualSense (reducido)
+FOOTER_COLOR = (8, 8, 12)
 SCREEN_W = LEFT_PANEL_W + GAME_W
 SCREEN_H = GAME_H + FOOTER_H
 
+# Backend de presentación: "software" (smoothscale en CPU) o "gpu" (SDL2
+# Renderer/Texture). Se elige al arrancar con --gpu o SNAKE_RENDERER=gpu;
+# si la GPU no está disponible se usa el camino por software.
+WINDOW_TITLE = "Snake Final - Menú, Pausa, DualSense (UI mejorada)"
 screen_flags = pygame.RESIZABLE
-screen = pygame.display.set_mode((SCREEN_W, SCREEN_H), screen_flags)
+screen = None
+gpu_presenter = None
+
+def open_display(backend):
+    """Abre la ventana con el backend pedido; devuelve el que se usa.
+
+    Si el renderer SDL2 no está disponible se usa "software" (set_mode).
+    """
+    global screen, gpu_presenter, RENDER_BACKEND
+    screen = gpu_presenter = None
+    if backend == "gpu":
+        gpu_presenter = GpuPresenter.create((SCREEN_W, SCREEN_H), WINDOW_TITLE)
+        if gpu_presenter is None:
+            print("Renderer SDL2 no disponible, usando presentación por software.")
+            backend = "software"
+    if gpu_presenter is None:
+        screen = pygame.display.set_mode((SCREEN_W, SCREEN_H), screen_flags)
+        pygame.display.set_caption(WINDOW_TITLE)
+    RENDER_BACKEND = backend
+    return backend
+
+RENDER_BACKEND = open_display(
+    "gpu" if ("--gpu" in sys.argv or os.environ.get("SNAKE_RENDERER") == "gpu") else "software"
+)
 # Superficie lógica donde dibujamos a tamaño base y luego la escalamos a la ventana
 canvas = pygame.Surface((SCREEN_W, SCREEN_H))
-pygame.display.set_caption("Snake Final - Menú, Pausa, DualSense (UI mejorada)")
 
 clock = pygame.time.Clock()
+# Capas pre-renderizadas (fondo estático, arte del DualSense...)
+static_layers = LayerCache()
+RENDER_FPS = 60  # límite de dibujo (0 = sin límite); la lógica no depende de él
+# Paso fijo: el tiempo real de cada frame se convierte en ticks lógicos
+# (global para sumar el retraso descartado de todas las partidas)
+timestep = FixedTimestep()
 
 # ----------------- RECURSOS -----------------
 hit_sound = pygame.mixer.Sound("pong_hit.wav")
@@ -39,11 +132,26 @@ menu_sound = pygame.mixer.Sound("menu_select.wav")
 font = pygame.font.SysFont("Consolas", 22, bold=True)
 big_font = pygame.font.SysFont("Consolas", 40, bold=True)
 small_font = pygame.font.SysFont("Consolas", 16)
-
-# Constantes del juego SNAKE
-GRID_SIZE = 10
+# Todo el texto pasa por esta caché (HUD y panel repiten casi siempre las mismas cadenas)
+text_cache = TextCache()
+# Atlas de glifos por (fuente, color) para los volcados RAW (se crean al primer uso)
+glyph_atlases = {}
+
+# Etapas medidas por el profiler, en orden de ejecución dentro del frame
+PROFILE_STAGES = (
+    "events", "handle_joystick_events", "logic", "board", "draw_kernel_panel",
+    "food", "snake", "particles", "hud", "draw_dualsense", "present_frame", "wait",
+)
+profiler = FrameProfiler(PROFILE_STAGES, enabled=PROFILE)
+
+def glyph_atlas(fnt, color):
+    atlas = glyph_atlases.get((fnt, color))
+    if atlas is None:
+        atlas = glyph_atlases[(fnt, color)] = GlyphAtlas(fnt, color)
+    return atlas
+
+# Constantes del juego SNAKE (reglas en snake_engine.py)
 CELL_SIZE = GAME_W // GRID_SIZE  # pixels por celda
-INITIAL_LIVES = 3
 
 # HID labels
 AXIS_LABELS = {
@@ -65,23 +173,32 @@ BUTTON_LABELS = {
     15: "Pad", 16: "MIC"
 }
 
-axis_states = {}
-button_states = {}
-event_log = []
-MAX_LOG = 10
+# Registro de entradas HID: buffer circular con marca de tiempo. El panel
+# de eventos y los paquetes RAW son vistas sobre él.
+HID_LOG_CAPACITY = 65536
+hid_log = EventRing(HID_LOG_CAPACITY)
+event_log = EventLogView(hid_log)
 
 # Estado para evitar logs repetidos por ruido/rumble
-last_axis_values = {}
-hat_states = {}
 input_mute_until = 0  # ms
 
+# JOYAXISMOTION agrupados por frame (último valor por eje)
+axis_events = AxisCoalescer()
+
 # Umbrales para registrar cambios en ejes
 AXIS_LOG_THRESHOLD = 0.18  # sólo loguear cambios mayores a este delta
-AXIS_DEADZONE = 0.28      # considerar muerto si dentro de este rango
+AXIS_DEADZONE = 0.28      # considerar muerto si dentro de este rango (radial en los sticks)
+AXIS_RESPONSE_CURVE = 1.0  # exponente de la curva de respuesta (1 = lineal)
+STICK_TURN_THRESHOLD = 0.3  # valor procesado para girar (~0.5 crudo con curva lineal)
+
+# Estado del mando (ejes crudos y procesados, botones, hats)
+controller = ControllerState(
+    joystick.get_numaxes() if use_controller else 0, deadzone=AXIS_DEADZONE, curve=AXIS_RESPONSE_CURVE
+)
 
-# RAW signals buffer (kernel -> HID -> datos binarios)
-raw_signals = []  # lista de bytes
-RAW_MAX = 8
+# RAW signals (kernel -> HID -> datos binarios), derivados de hid_log
+raw_signals = RawSignalsView(hid_log)
+RAW_MAX = 5   # paquetes RAW mostrados en el panel
 
 # Snapshot of internal memory to display in panel
 kernel_memory = {}
@@ -103,14 +220,32 @@ BUTTON_COLORS = {
 }
 
 # ----------------- UTILIDADES HID -----------------
-def log_event(text):
-    event_log.append(text)
-    if len(event_log) > MAX_LOG:
-        event_log.pop(0)
+def log_event(kind, code=0, value=0.0):
+    """Registra un evento (sin formatear: el texto se genera al mostrarlo)."""
+    hid_log.append(time.perf_counter(), kind, code, value)
+
+def format_event(record):
+    """Línea del panel de eventos para un registro de hid_log."""
+    kind = int(record["kind"])
+    code = int(record["code"])
+    value = float(record["value"])
+    if kind == KIND_BUTTON:
+        return f"[BTN] {BUTTON_LABELS.get(code, f'BTN_{code}')}"
+    if kind == KIND_AXIS:
+        return f"[AXIS] {AXIS_LABELS.get(code, f'AXIS_{code}')} = {value:.2f}"
+    if kind == KIND_HAT:
+        return f"[HAT] {unpack_hat(value)}"
+    if kind == KIND_SPEED:
+        return f"Speed: {value:.1f}"
+    if kind == KIND_LIFE:
+        return f"Vida perdida! Quedan: {int(value)}"
+    if kind == KIND_KEY:
+        return f"[KEY] {pygame.key.name(code)}"
+    return f"[{kind:02X}] {code} {value:g}"
 
 def handle_joystick_events(event):
     """Actualiza logs y estados HID."""
-    global axis_states, button_states, last_axis_values, hat_states, input_mute_until
+    global input_mute_until
     if not use_controller:
         return
     now = pygame.time.get_ticks()
@@ -120,63 +255,46 @@ def handle_joystick_events(event):
 
     if event.type == pygame.JOYBUTTONDOWN:
         btn = event.button
-        button_states[btn] = True
+        controller.set_button(btn, True)
         button_glow[btn] = pygame.time.get_ticks()
-        log_event(f"[BTN] {BUTTON_LABELS.get(btn, f'BTN_{btn}')}")
         # RAW: B <btn>
-        try:
-            raw = bytes([0x42, btn & 0xFF])
-            raw_signals.append(raw)
-            if len(raw_signals) > RAW_MAX:
-                raw_signals.pop(0)
-        except Exception:
-            pass
+        log_event(KIND_BUTTON, btn, 1.0)
     elif event.type == pygame.JOYBUTTONUP:
-        btn = event.button
-        button_states[btn] = False
+        controller.set_button(event.button, False)
         # No registrar botón al soltar para evitar duplicados en el log
     elif event.type == pygame.JOYAXISMOTION:
-        axis = event.axis
-        val = joystick.get_axis(axis)
-        prev = last_axis_values.get(axis, 0.0)
-        # Aplicar deadzone: valores pequeños son tratados como 0
-        disp_val = 0.0 if abs(val) < AXIS_DEADZONE else val
-        # Registrar sólo si cambio significativo
-        if not muted and abs(disp_val - prev) > AXIS_LOG_THRESHOLD:
-            axis_states[axis] = val
-            last_axis_values[axis] = disp_val
-            log_event(f"[AXIS] {AXIS_LABELS.get(axis, f'AXIS_{axis}')} = {val:.2f}")
-            # RAW: A <axis> <value8>
-            try:
-                q = int(max(-127, min(127, val * 127)))
-                raw = bytes([0x41, axis & 0xFF, q & 0xFF])
-                raw_signals.append(raw)
-                if len(raw_signals) > RAW_MAX:
-                    raw_signals.pop(0)
-            except Exception:
-                pass
-        else:
-            # Actualizar estado interno sin log si no supera umbral
-            axis_states[axis] = val
-            last_axis_values[axis] = disp_val
+        # Sólo se guarda el último valor; se procesa en process_axis_events()
+        axis_events.add(event.axis, event.value)
     elif event.type == pygame.JOYHATMOTION:
         # Juega with HAT: sólo loguear si cambia respecto estado previo
         hat_idx = 0
-        prev_hat = hat_states.get(hat_idx, (0, 0))
+        prev_hat = controller.set_hat(hat_idx, event.value)
         if not muted and event.value != prev_hat:
-            hat_states[hat_idx] = event.value
-            log_event(f"[HAT] {event.value}")
             # RAW: H <x> <y>
-            try:
-                hx, hy = event.value
-                raw = bytes([0x48, (hx & 0xFF), (hy & 0xFF)])
-                raw_signals.append(raw)
-                if len(raw_signals) > RAW_MAX:
-                    raw_signals.pop(0)
-            except Exception:
-                pass
-        else:
-            hat_states[hat_idx] = event.value
+            log_event(KIND_HAT, hat_idx, pack_hat(*event.value))
+
+def process_axis_events():
+    """Cierra el frame de entrada: ejes, deadzone, curvas y flancos de botones.
+
+    Se llama tras vaciar la cola de eventos, con el último valor de cada
+    eje que se movió en el frame (ver AxisCoalescer). Devuelve esos ejes.
+    """
+    if not use_controller:
+        return []
+    moved = axis_events.drain()
+    for axis, val in moved:
+        controller.set_axis(axis, val)
+    controller.update()
+    if pygame.time.get_ticks() >= input_mute_until:
+        log_axis_changes()
+    return [axis for axis, _ in moved]
+
+def log_axis_changes():
+    """Registra sólo los ejes cuyo valor procesado cambió de forma significativa."""
+    changed = np.flatnonzero(np.abs(controller.axes - controller.prev_axes) > AXIS_LOG_THRESHOLD)
+    for axis in changed.tolist():
+        # RAW: A <axis> <value8>
+        log_event(KIND_AXIS, axis, controller.raw_axis(axis))
 
 
 def trigger_rumble(joy, duration_ms=200, strong=0.7, weak=0.3):
@@ -214,246 +332,426 @@ def axis_up_down(axis_val, threshold=0.5):
         return 1
     return 0
 
+# Mapeos de entradas a direcciones del Snake
+KEY_DIRS = {pygame.K_UP: UP, pygame.K_DOWN: DOWN, pygame.K_LEFT: LEFT, pygame.K_RIGHT: RIGHT}
+DPAD_BUTTON_DIRS = {11: UP, 12: DOWN, 13: LEFT, 14: RIGHT}
+FACE_BUTTON_DIRS = {3: UP, 1: RIGHT, 0: DOWN, 2: LEFT}
+
+def hat_direction(value):
+    """Convierte el valor del HAT (x, y) en dirección del Snake (o None)."""
+    hat_x, hat_y = value
+    if hat_y == 1:
+        return UP
+    if hat_y == -1:
+        return DOWN
+    if hat_x == -1:
+        return LEFT
+    if hat_x == 1:
+        return RIGHT
+    return None
+
+def stick_direction(x, y, threshold=0.5):
+    """Dirección según el eje dominante de un stick (o None si no supera el umbral)."""
+    if abs(x) > abs(y):  # Movimiento horizontal dominante
+        if x < -threshold:
+            return LEFT
+        if x > threshold:
+            return RIGHT
+    else:  # Movimiento vertical dominante
+        if y < -threshold:
+            return UP
+        if y > threshold:
+            return DOWN
+    return None
+
+def input_direction(kind, code, value, stick_axes):
+    """Dirección pedida por un registro del mando (kind, code, value), o None.
+
+    Los ejes llegan ya procesados (deadzone y curva). stick_axes guarda el
+    último valor de cada eje (se actualiza aquí) para evaluar el stick
+    completo cuando llega sólo uno de sus ejes.
+    """
+    if kind == KIND_BUTTON:
+        if value:
+            return DPAD_BUTTON_DIRS.get(code) or FACE_BUTTON_DIRS.get(code)
+    elif kind == KIND_HAT:
+        return hat_direction(unpack_hat(value))
+    elif kind == KIND_AXIS and code < 4:
+        stick_axes[code] = value
+        # Parejas de ejes (0, 1) y (2, 3)
+        return stick_direction(stick_axes.get(code & ~1, 0.0), stick_axes.get(code | 1, 0.0), STICK_TURN_THRESHOLD)
+    return None
+
+# Grabación de la partida en curso (SessionRecorder) o None
+session_recorder = None
+
+def apply_input(engine, kind, code, value, stick_axes, t=None):
+    """Aplica al motor una entrada de juego: giros y velocidad (L1/R1).
+
+    Es el único camino de las entradas hacia el motor, en vivo y al
+    reproducir una grabación. Si se está grabando, la entrada se guarda
+    con el tick lógico actual (t: instante de perf_counter de la entrada).
+    """
+    if kind == KIND_AXIS:
+        # Mismo redondeo que en la grabación (f32) para reproducir igual
+        value = float(np.float32(value))
+    if session_recorder is not None:
+        session_recorder.record(engine.ticks, kind, code, value, t)
+    if kind == KIND_KEY:
+        new_dir = KEY_DIRS.get(code)
+    elif kind == KIND_BUTTON and value and code in (9, 10):
+        # L1 / R1 para ajustar velocidad (L1 más rápida, R1 más lenta, como antes)
+        log_event(KIND_SPEED, value=engine.change_speed(+SPEED_STEP if code == 9 else -SPEED_STEP))
+        return
+    else:
+        new_dir = input_direction(kind, code, value, stick_axes)
+    if new_dir:
+        engine.turn(new_dir)
+
+# Keyframe de la grabación: último valor de los ejes de los sticks (estado de
+# apply_input) seguido del snapshot del motor
+KEYFRAME_AXES = struct.Struct("<4f")
+
+def keyframe_state(engine, stick_axes):
+    return KEYFRAME_AXES.pack(*(stick_axes.get(axis, 0.0) for axis in range(4))) + engine.snapshot()
+
+def restore_keyframe(engine, stick_axes, state):
+    stick_axes.clear()
+    stick_axes.update(enumerate(KEYFRAME_AXES.unpack_from(state, 0)))
+    engine.restore(memoryview(state)[KEYFRAME_AXES.size:])
 
-def present_frame():
-    """Escala el canvas a la ventana actual y presenta en pantalla."""
-    window_w, window_h = screen.get_size()
+def seek_replay(engine, replay, stick_axes, target):
+    """Lleva la reproducción al tick target (como mucho KEYFRAME_TICKS pasos).
+
+    Hacia delante simula desde el tick actual si no hay un keyframe más
+    cercano; si no, restaura el último keyframe anterior a target.
+    """
+    if replay.end_tick is not None:
+        target = min(target, replay.end_tick - 1)
+    target = max(target, 0)
+    if not (engine.ticks <= target and replay.keyframe_index(target) == replay.keyframe_index(engine.ticks)):
+        state = replay.seek(target)
+        if state is None:
+            engine.reset(replay.reader.seed)
+            stick_axes.clear()
+        else:
+            restore_keyframe(engine, stick_axes, state)
+    while engine.ticks < target:
+        for _, _, kind, code, value in replay.due(engine.ticks):
+            apply_input(engine, kind, code, value, stick_axes)
+        if replay.ended:
+            break
+        engine.tick()
+
+
+def letterbox(window_size):
+    """(scale, rect) del canvas escalado sin deformar y centrado en la ventana."""
+    window_w, window_h = window_size
     scale = min(window_w / SCREEN_W, window_h / SCREEN_H)
     target_w = int(SCREEN_W * scale)
     target_h = int(SCREEN_H * scale)
+    return scale, pygame.Rect((window_w - target_w) // 2, (window_h - target_h) // 2, target_w, target_h)
 
-    # Letterbox: fondo limpio y centrado
-    screen.fill((0, 0, 0))
-    scaled = pygame.transform.smoothscale(canvas, (target_w, target_h))
-    offset_x = (window_w - target_w) // 2
-    offset_y = (window_h - target_h) // 2
-    screen.blit(scaled, (offset_x, offset_y))
-    pygame.display.flip()
+def present_frame(dirty=None):
+    """Escala el canvas a la ventana actual y presenta en pantalla.
 
-# ----------------- DIBUJO DEL DUALSENSE (SVG STYLE) -----------------
-def draw_dualsense(surface, center_x, center_y, max_w, max_h, axes, btns):
-    """
-    Dibuja un DualSense estilo SVG minimalista (como GamepadTester),
-    escalado para caber dentro de max_w x max_h.
+    - dirty: None para el frame completo (flip), o lista de rects del canvas
+      que cambiaron; sólo esas zonas se escalan (o se copian tal cual a 1:1)
+      y se actualizan con pygame.display.update(rects).
 
-    - axes: dict {axis_index: value_float (-1..1)}
-    - btns: dict {button_index: bool}
+    Con el backend "gpu" el canvas se sube a una textura y el escalado y el
+    letterbox los hace el renderer.
     """
+    if gpu_presenter is not None:
+        gpu_presenter.present(canvas, dirty)
+        return
 
-    # --- Config base del SVG original ---
-    SVG_W, SVG_H = 441.0, 383.0   # viewBox del SVG que compartiste
+    scale, target = letterbox(screen.get_size())
+    offset_x, offset_y, target_w, target_h = target
 
-    # Escala para que quepa en el espacio disponible
-    scale = min(max_w / SVG_W, max_h / SVG_H)
-    if scale <= 0:
+    if dirty is None:
+        # Letterbox: fondo limpio y centrado
+        screen.fill((0, 0, 0))
+        if (target_w, target_h) == (SCREEN_W, SCREEN_H):
+            screen.blit(canvas, (offset_x, offset_y))
+        else:
+            scaled = pygame.transform.smoothscale(canvas, (target_w, target_h))
+            screen.blit(scaled, (offset_x, offset_y))
+        pygame.display.flip()
         return
 
-    stroke_color = (195, 210, 240)       # hsl(210,50%,85%) ~ azul clarito
-    stroke_width = max(1, int(3 * scale))
-    outline_alpha = 255
+    canvas_rect = canvas.get_rect()
+    updated = []
+    for rect in dirty:
+        # Margen de 1px para que el filtrado del escalado no deje costuras
+        src = rect.inflate(2, 2).clip(canvas_rect)
+        if not src:
+            continue
+        if (target_w, target_h) == (SCREEN_W, SCREEN_H):
+            updated.append(screen.blit(canvas, (src.x + offset_x, src.y + offset_y), src))
+            continue
+        x0 = offset_x + int(src.x * scale)
+        y0 = offset_y + int(src.y * scale)
+        x1 = offset_x + int(math.ceil(src.right * scale))
+        y1 = offset_y + int(math.ceil(src.bottom * scale))
+        if x1 <= x0 or y1 <= y0:
+            continue
+        scaled = pygame.transform.smoothscale(canvas.subsurface(src), (x1 - x0, y1 - y0))
+        updated.append(screen.blit(scaled, (x0, y0)))
+    pygame.display.update(updated)
 
-    # Helper para transformar coords SVG → pantalla
+# ----------------- DIBUJO DEL DUALSENSE (SVG STYLE) -----------------
+# Geometría del SVG original (viewBox 441 x 383)
+SVG_W, SVG_H = 441.0, 383.0
+DS_STROKE_COLOR = (195, 210, 240)       # hsl(210,50%,85%) ~ azul clarito
+DS_LABEL = "DualSense Wireless Controller (SVG style)"
+
+# Silueta (aprox paths LOutline & ROutline)
+DS_LEFT_OUTLINE = [
+    (220.5, 294.5),
+    (195.0, 294.5),
+    (150.0, 294.5),
+    (81.5, 378.5),
+    (49.5, 378.5),
+    (17.5, 378.5),
+    (4.0, 317.5),
+    (4.0, 271.1),
+    (43.5, 165.5),
+    (55.0, 137.5),
+    (66.5, 109.5),
+    (95.5, 92.0),
+    (128.0, 92.0),
+    (154.0, 92.0),
+    (200.5, 92.0),
+    (220.5, 92.0),
+]
+DS_RIGHT_OUTLINE = [
+    (220.0, 294.5),
+    (245.5, 294.5),
+    (290.5, 294.5),
+    (335.5, 294.5),
+    (359.0, 378.5),
+    (391.0, 378.5),
+    (423.0, 378.5),
+    (436.5, 317.5),
+    (436.5, 271.1),
+    (397.0, 165.5),
+    (385.5, 137.5),
+    (374.0, 109.5),
+    (345.0, 92.0),
+    (312.5, 92.0),
+    (286.5, 92.0),
+    (240.0, 92.0),
+    (220.0, 92.0),
+]
+
+# Círculos principales (sticks, D-pad, botones frontales)
+DS_CIRCLES = {
+    "LStickOutline": (113, 160, 37.5),
+    "RStickOutline": (278, 238, 37.5),
+    "DOutline":      (166, 238, 37.5),
+    "BOutline":      (329, 160, 37.5),
+}
+DS_L1_R1 = [(111.5, 61.5, 41, 13), (289.5, 61.5, 41, 13)]
+DS_L2_R2 = [(138.5, 23, 30, 40), (303.5, 23, 30, 40)]   # cápsulas (cx, cy, w, h)
+DS_META = [(185, 162), (259, 162)]                        # LMeta, RMeta
+DS_LS_CENTER = (113, 160)
+DS_RS_CENTER = (278, 238)
+
+# Botones ABXY dentro de "BOutline": (botón, posición, color)
+DS_FACE_BUTTONS = [
+    (3, "top",    (120, 255, 170)),   # Triangle – verde
+    (1, "right",  (255, 90, 150)),    # O – rosa/rojo
+    (0, "bottom", (70, 180, 255)),    # X – azul
+    (2, "left",   (205, 205, 240)),   # Square – gris claro
+]
+
+def _ds_dpad_arrow(direction):
+    """Triángulo (coords SVG) de una flecha del D-pad."""
+    bx, by, d_r = DS_CIRCLES["DOutline"]
+    base_len = d_r * 0.6
+    if direction == "up":
+        return [
+            (bx, by - base_len),
+            (bx - base_len * 0.6, by - base_len * 0.1),
+            (bx + base_len * 0.6, by - base_len * 0.1),
+        ]
+    if direction == "down":
+        return [
+            (bx, by + base_len),
+            (bx - base_len * 0.6, by + base_len * 0.1),
+            (bx + base_len * 0.6, by + base_len * 0.1),
+        ]
+    if direction == "left":
+        return [
+            (bx - base_len, by),
+            (bx - base_len * 0.1, by - base_len * 0.6),
+            (bx - base_len * 0.1, by + base_len * 0.6),
+        ]
+    # right
+    return [
+        (bx + base_len, by),
+        (bx + base_len * 0.1, by - base_len * 0.6),
+        (bx + base_len * 0.1, by + base_len * 0.6),
+    ]
+
+def _ds_face_button_pos(pos_key):
+    """Centro (coords SVG) de un botón ABXY."""
+    bx_cx, bx_cy, bx_r = DS_CIRCLES["BOutline"]
+    ox, oy = {
+        "top":    (0, -bx_r * 0.55),
+        "right":  (bx_r * 0.55, 0),
+        "bottom": (0, bx_r * 0.55),
+        "left":   (-bx_r * 0.55, 0),
+    }[pos_key]
+    return bx_cx + ox, bx_cy + oy
+
+def _ds_layout(scale):
+    """Tamaño de la superficie cacheada y posición del centro del SVG en ella."""
+    label_w, label_h = small_font.size(DS_LABEL)
+    width = max(int(math.ceil(SVG_W * scale)), label_w) + 8
+    origin_x = width // 2
+    origin_y = int(math.ceil(SVG_H / 2.0 * scale)) + 4
+    label_y = origin_y + int((SVG_H / 2 + 12) * scale)
+    height = max(origin_y + int(math.ceil(SVG_H / 2.0 * scale)) + 4, label_y + label_h)
+    return (width, height), (origin_x, origin_y), label_y
+
+def _ds_transform(scale, center_x, center_y):
+    """Helper para transformar coords SVG → pantalla."""
     def T(x, y):
         # centro del svg
         sx = (x - SVG_W / 2.0) * scale + center_x
         sy = (y - SVG_H / 2.0) * scale + center_y
         return int(sx), int(sy)
+    return T
 
-    # ---------- DIBUJO: Silueta (aprox paths LOutline & ROutline) ----------
-    left_outline_pts = [
-        (220.5, 294.5),
-        (195.0, 294.5),
-        (150.0, 294.5),
-        (81.5, 378.5),
-        (49.5, 378.5),
-        (17.5, 378.5),
-        (4.0, 317.5),
-        (4.0, 271.1),
-        (43.5, 165.5),
-        (55.0, 137.5),
-        (66.5, 109.5),
-        (95.5, 92.0),
-        (128.0, 92.0),
-        (154.0, 92.0),
-        (200.5, 92.0),
-        (220.5, 92.0),
-    ]
-    right_outline_pts = [
-        (220.0, 294.5),
-        (245.5, 294.5),
-        (290.5, 294.5),
-        (335.5, 294.5),
-        (359.0, 378.5),
-        (391.0, 378.5),
-        (423.0, 378.5),
-        (436.5, 317.5),
-        (436.5, 271.1),
-        (397.0, 165.5),
-        (385.5, 137.5),
-        (374.0, 109.5),
-        (345.0, 92.0),
-        (312.5, 92.0),
-        (286.5, 92.0),
-        (240.0, 92.0),
-        (220.0, 92.0),
-    ]
+def draw_dualsense_art(surface, scale):
+    """Parte fija del mando (siluetas, aros, gatillos, flechas, botones sin pulsar y etiqueta).
 
-    import pygame.gfxdraw
+    Se dibuja una vez por escala sobre el color del footer (opaca, para que
+    el antialiasing se mezcle igual que al dibujar directamente en el canvas).
+    """
+    _, (origin_x, origin_y), label_y = _ds_layout(scale)
+    surface.fill(FOOTER_COLOR)
+    T = _ds_transform(scale, origin_x, origin_y)
+    stroke_color = DS_STROKE_COLOR
 
     # Dibujar silhouette suavizada
-    def draw_polyline(points):
-        if len(points) < 2:
-            return
+    for points in (DS_LEFT_OUTLINE, DS_RIGHT_OUTLINE):
         transformed = [T(x, y) for (x, y) in points]
         pygame.draw.aalines(surface, stroke_color, False, transformed, True)
 
-    draw_polyline(left_outline_pts)
-    draw_polyline(right_outline_pts)
-
-    # ---------- CÍRCULOS PRINCIPALES (sticks, D-pad, botones frontales) ----------
-    circles = {
-        "LStickOutline": (113, 160, 37.5),
-        "RStickOutline": (278, 238, 37.5),
-        "DOutline":      (166, 238, 37.5),
-        "BOutline":      (329, 160, 37.5),
-    }
-
-    for _, (cx, cy, r) in circles.items():
+    for (cx, cy, r) in DS_CIRCLES.values():
         cx_s, cy_s = T(cx, cy)
         r_s = int(r * scale)
         pygame.gfxdraw.aacircle(surface, cx_s, cy_s, r_s, stroke_color)
         pygame.gfxdraw.aacircle(surface, cx_s, cy_s, r_s - 1, stroke_color)
 
-    # ---------- L1 / R1 rectángulos ----------
-    l1 = (111.5, 61.5, 41, 13)
-    r1 = (289.5, 61.5, 41, 13)
-    for (x, y, w, h) in (l1, r1):
+    # L1 / R1 rectángulos
+    for (x, y, w, h) in DS_L1_R1:
         x1, y1 = T(x, y)
         x2, y2 = T(x + w, y + h)
         rect = pygame.Rect(x1, y1, x2 - x1, y2 - y1)
         pygame.draw.rect(surface, stroke_color, rect, max(1, int(2 * scale)), border_radius=int(6 * scale))
 
-    # ---------- L2 / R2 (aprox) ----------
-    def draw_capsule(cx, cy, w, h):
+    # L2 / R2 (aprox)
+    for (cx, cy, w, h) in DS_L2_R2:
         cx_s, cy_s = T(cx, cy)
         w_s = int(w * scale)
         h_s = int(h * scale)
         rect = pygame.Rect(cx_s - w_s//2, cy_s - h_s//2, w_s, h_s)
         pygame.draw.ellipse(surface, stroke_color, rect, max(1, int(2 * scale)))
 
-    draw_capsule(138.5, 23, 30, 40)  # L2
-    draw_capsule(303.5, 23, 30, 40)  # R2
+    # D-Pad (flechas)
+    for direction in ("up", "down", "left", "right"):
+        pts_t = [T(x, y) for (x, y) in _ds_dpad_arrow(direction)]
+        pygame.gfxdraw.aapolygon(surface, pts_t, stroke_color)
 
-    # ---------- L-stick y R-stick puntos móviles ----------
-    ls_center = (113, 160)
-    rs_center = (278, 238)
-
-    lx = axes.get(0, 0.0)
-    ly = axes.get(1, 0.0)
-    rx = axes.get(2, 0.0)
-    ry = axes.get(3, 0.0)
-
-    def draw_stick(center, ax_x, ax_y):
-        cx, cy = center
-        cx_s, cy_s = T(cx, cy)
-        max_r = 20 * scale
-        x_off = int(ax_x * max_r)
-        y_off = int(ax_y * max_r)
-        dot_r = int(7 * scale)
+    # Botones ABXY sin pulsar (al pulsar se rellenan encima en draw_dualsense)
+    for _, pos_key, base_col in DS_FACE_BUTTONS:
+        px, py = T(*_ds_face_button_pos(pos_key))
+        r_btn = int(9 * scale)
+        pygame.gfxdraw.filled_circle(surface, px, py, r_btn, (10, 10, 10))
+        pygame.gfxdraw.aacircle(surface, px, py, r_btn, base_col)
+        pygame.gfxdraw.filled_circle(surface, px - int(3*scale), py - int(3*scale), int(3*scale), (230, 240, 255))
 
-        pygame.gfxdraw.filled_circle(surface, cx_s + x_off, cy_s + y_off, dot_r, (230, 236, 248))
-        pygame.gfxdraw.aacircle(surface, cx_s + x_off, cy_s + y_off, dot_r, (120, 140, 180))
+    # Meta buttons (LMeta, RMeta)
+    for (mx, my) in DS_META:
+        mx_s, my_s = T(mx, my)
+        r_m = int(10 * scale)
+        pygame.gfxdraw.aacircle(surface, mx_s, my_s, r_m, stroke_color)
 
-    draw_stick(ls_center, lx, ly)
-    draw_stick(rs_center, rx, ry)
+    # Texto etiqueta
+    label = text_cache.render(small_font, DS_LABEL, (200, 210, 235))
+    surface.blit(label, (origin_x - label.get_width() // 2, label_y))
 
-    # ---------- D-Pad (flechas) ----------
-    d_cx, d_cy, d_r = circles["DOutline"]
-    base_len = d_r * 0.6
+def draw_dualsense(surface, center_x, center_y, max_w, max_h, controller):
+    """
+    Dibuja un DualSense estilo SVG minimalista (como GamepadTester),
+    escalado para caber dentro de max_w x max_h.
 
-    def draw_dpad_arrow(direction, pressed=False):
-        bx, by = d_cx, d_cy
-        if direction == "up":
-            points = [
-                (bx, by - base_len),
-                (bx - base_len * 0.6, by - base_len * 0.1),
-                (bx + base_len * 0.6, by - base_len * 0.1),
-            ]
-        elif direction == "down":
-            points = [
-                (bx, by + base_len),
-                (bx - base_len * 0.6, by + base_len * 0.1),
-                (bx + base_len * 0.6, by + base_len * 0.1),
-            ]
-        elif direction == "left":
-            points = [
-                (bx - base_len, by),
-                (bx - base_len * 0.1, by - base_len * 0.6),
-                (bx - base_len * 0.1, by + base_len * 0.6),
-            ]
-        else:  # right
-            points = [
-                (bx + base_len, by),
-                (bx + base_len * 0.1, by - base_len * 0.6),
-                (bx + base_len * 0.1, by + base_len * 0.6),
-            ]
-
-        pts_t = [T(x, y) for (x, y) in points]
-        col = (stroke_color[0], stroke_color[1], stroke_color[2])
-        if pressed:
-            fill = (220, 230, 255)
-            pygame.gfxdraw.filled_polygon(surface, pts_t, fill)
-        pygame.gfxdraw.aapolygon(surface, pts_t, col)
-
-    draw_dpad_arrow("up")
-    draw_dpad_arrow("down")
-    draw_dpad_arrow("left")
-    draw_dpad_arrow("right")
-
-    # ---------- Botones ABXY (círculo "BOutline") ----------
-    bx_cx, bx_cy, bx_r = circles["BOutline"]
-    offsets = {
-        "top":    (0, -bx_r * 0.55),
-        "right":  (bx_r * 0.55, 0),
-        "bottom": (0, bx_r * 0.55),
-        "left":   (-bx_r * 0.55, 0),
-    }
+    El arte fijo se rasteriza una vez por escala (draw_dualsense_art, en
+    static_layers); cada frame sólo se dibujan encima los sticks y los
+    botones pulsados.
 
-    mapping = [
-        (3, "top",    (120, 255, 170)),   # Triangle – verde
-        (1, "right",  (255, 90, 150)),    # O – rosa/rojo
-        (0, "bottom", (70, 180, 255)),    # X – azul
-        (2, "left",   (205, 205, 240)),   # Square – gris claro
-    ]
+    - controller: ControllerState; se usan los ejes crudos de los sticks
+      (raw_axis 0..3) y los botones pulsados (pressed)
 
-    for btn_index, pos_key, base_col in mapping:
-        ox, oy = offsets[pos_key]
-        px, py = T(bx_cx + ox, bx_cy + oy)
-        r_btn = int(9 * scale)
-        pressed = btns.get(btn_index, False)
+    Devuelve el rect que ocupa el dibujo.
+    """
+    # Escala para que quepa en el espacio disponible
+    scale = min(max_w / SVG_W, max_h / SVG_H)
+    if scale <= 0:
+        return None
 
-        fill_col = (base_col if pressed else (10, 10, 10))
-        pygame.gfxdraw.filled_circle(surface, px, py, r_btn, fill_col)
-        pygame.gfxdraw.aacircle(surface, px, py, r_btn, base_col)
+    size, (origin_x, origin_y), _ = _ds_layout(scale)
+    art = static_layers.get("dualsense", size, (scale, size), lambda s: draw_dualsense_art(s, scale))
+    area = surface.blit(art, (center_x - origin_x, center_y - origin_y))
+    T = _ds_transform(scale, center_x, center_y)
 
-        if not pressed:
-            pygame.gfxdraw.filled_circle(surface, px - int(3*scale), py - int(3*scale), int(3*scale), (230, 240, 255))
+    # ---------- L-stick y R-stick puntos móviles ----------
+    lx = controller.raw_axis(0)
+    ly = controller.raw_axis(1)
+    rx = controller.raw_axis(2)
+    ry = controller.raw_axis(3)
+    max_r = 20 * scale
+    dot_r = int(7 * scale)
+    for (cx, cy), ax_x, ax_y in ((DS_LS_CENTER, lx, ly), (DS_RS_CENTER, rx, ry)):
+        cx_s, cy_s = T(cx, cy)
+        x_off = int(ax_x * max_r)
+        y_off = int(ax_y * max_r)
+        pygame.gfxdraw.filled_circle(surface, cx_s + x_off, cy_s + y_off, dot_r, (230, 236, 248))
+        pygame.gfxdraw.aacircle(surface, cx_s + x_off, cy_s + y_off, dot_r, (120, 140, 180))
 
-    # ---------- Meta buttons (LMeta, RMeta) ----------
-    meta_L = (185, 162)
-    meta_R = (259, 162)
-    for (mx, my) in (meta_L, meta_R):
-        mx_s, my_s = T(mx, my)
-        r_m = int(10 * scale)
-        pygame.gfxdraw.aacircle(surface, mx_s, my_s, r_m, stroke_color)
+    # ---------- Botones ABXY pulsados ----------
+    r_btn = int(9 * scale)
+    for btn_index, pos_key, base_col in DS_FACE_BUTTONS:
+        if controller.pressed(btn_index):
+            px, py = T(*_ds_face_button_pos(pos_key))
+            pygame.gfxdraw.filled_circle(surface, px, py, r_btn, base_col)
+            pygame.gfxdraw.aacircle(surface, px, py, r_btn, base_col)
 
-    # ---------- Texto etiqueta ----------
-    label = small_font.render("DualSense Wireless Controller (SVG style)", True, (200, 210, 235))
-    surface.blit(label, (center_x - label.get_width() // 2, center_y + int((SVG_H/2 + 12) * scale)))
+    return area
 
 # ----------------- PANEL KERNEL / HID -----------------
-def draw_kernel_panel(surface, pause_buttons):
-    """Panel izquierdo compacto con eventos y ejes HID."""
+# Bloques del panel: (rect, color de borde, título, color del título)
+PANEL_EVENTS_RECT = pygame.Rect(8, 50, LEFT_PANEL_W - 16, 140)
+# Acortamos este bloque para que termine justo después del segundo 'Right'
+PANEL_AXES_RECT = pygame.Rect(8, 200, LEFT_PANEL_W - 16, 110)
+PANEL_RAW_RECT = pygame.Rect(8, PANEL_AXES_RECT.bottom + 12, LEFT_PANEL_W - 16, 110)
+PANEL_STATE_RECT = pygame.Rect(8, PANEL_RAW_RECT.bottom + 12, LEFT_PANEL_W - 16, 160)
+PANEL_BLOCKS = [
+    (PANEL_EVENTS_RECT, (40, 120, 180), "Eventos HID", (100, 180, 255)),
+    (PANEL_AXES_RECT, (200, 170, 60), "Joystick Izq.", (255, 200, 80)),
+    (PANEL_RAW_RECT, (80, 160, 200), "Señales RAW (Hex / Bin)", (140, 220, 240)),
+    (PANEL_STATE_RECT, (200, 160, 80), "Estado Interno (Ciclo Von Neumann)", (240, 200, 140)),
+]
+# Zonas con contenido dinámico (para los dirty rects)
+PANEL_CONTENT_RECT = PANEL_EVENTS_RECT.unionall([PANEL_AXES_RECT, PANEL_RAW_RECT, PANEL_STATE_RECT])
+PANEL_PAUSE_LABEL_RECT = pygame.Rect(0, SCREEN_H - 32, LEFT_PANEL_W, 24)
+
+def draw_kernel_panel_chrome(surface):
+    """Parte fija del panel izquierdo: fondo, cabecera y marcos de los bloques."""
     # Fondo
     panel_rect = pygame.Rect(0, 0, LEFT_PANEL_W, SCREEN_H)
     pygame.draw.rect(surface, (10, 10, 16), panel_rect)
@@ -462,77 +760,70 @@ def draw_kernel_panel(surface, pause_buttons):
     # Header general
     header_rect = pygame.Rect(0, 0, LEFT_PANEL_W, 40)
     pygame.draw.rect(surface, (18, 18, 28), header_rect)
-    title = small_font.render("HID / KERNEL MONITOR", True, (180, 200, 240))
+    title = text_cache.render(small_font, "HID / KERNEL MONITOR", (180, 200, 240))
     surface.blit(title, (8, 10))
 
     # Línea separadora
     pygame.draw.line(surface, (50, 70, 110), (0, 40), (LEFT_PANEL_W, 40), 2)
 
-    # ---- Bloque: Event Log (más compacto) ----
-    block1 = pygame.Rect(8, 50, LEFT_PANEL_W - 16, 140)
-    pygame.draw.rect(surface, (18, 18, 28), block1, border_radius=6)
-    pygame.draw.rect(surface, (40, 120, 180), block1, 1, border_radius=6)
-    h1 = small_font.render("Eventos HID", True, (100, 180, 255))
-    surface.blit(h1, (block1.x + 8, block1.y + 4))
+    for block, border_col, header, header_col in PANEL_BLOCKS:
+        pygame.draw.rect(surface, (18, 18, 28), block, border_radius=6)
+        pygame.draw.rect(surface, border_col, block, 1, border_radius=6)
+        h = text_cache.render(small_font, header, header_col)
+        surface.blit(h, (block.x + 8, block.y + 4))
+
+def draw_kernel_panel(surface, pause_buttons):
+    """Contenido dinámico del panel izquierdo (eventos y ejes HID).
 
+    Los marcos se dibujan aparte en draw_kernel_panel_chrome (capa estática).
+    Se dibuja encima del tablero ya copiado, así que todo se recorta a
+    PANEL_CONTENT_RECT y PANEL_PAUSE_LABEL_RECT (los dirty rects del panel):
+    las líneas largas del log se cortan en vez de pisar el tablero.
+    """
+    prev_clip = surface.get_clip()
+    surface.set_clip(PANEL_CONTENT_RECT.clip(prev_clip))
+
+    # ---- Bloque: Event Log (más compacto) ----
+    block1 = PANEL_EVENTS_RECT
     y = block1.y + 22
-    for line in event_log[-5:]:
-        bullet = small_font.render("•", True, (100, 255, 150))
+    for line in map(format_event, event_log.last(5)):
+        bullet = text_cache.render(small_font, "•", (100, 255, 150))
         surface.blit(bullet, (block1.x + 8, y))
-        t = small_font.render(line, True, (190, 190, 190))
+        t = text_cache.render(small_font, line, (190, 190, 190))
         surface.blit(t, (block1.x + 18, y))
         y += 20
 
     # ---- Bloque: Axis States (más compacto) ----
-    # Acortamos este bloque para que termine justo después del segundo 'Right'
-    block2 = pygame.Rect(8, 200, LEFT_PANEL_W - 16, 110)
-    pygame.draw.rect(surface, (18, 18, 28), block2, border_radius=6)
-    pygame.draw.rect(surface, (200, 170, 60), block2, 1, border_radius=6)
-    h2 = small_font.render("Joystick Izq.", True, (255, 200, 80))
-    surface.blit(h2, (block2.x + 8, block2.y + 4))
-
+    block2 = PANEL_AXES_RECT
     y = block2.y + 22
     # Solo mostrar L-stick y R2 (eje 2 y 3)
     for idx in [0, 1, 2, 3]:
-        if idx in axis_states:
+        if idx < controller.n_axes:
             label = AXIS_LABELS.get(idx, f"AXIS_{idx}").split("(")[1].strip(")")  # Solo la parte entre paréntesis
-            val = axis_states[idx]
+            val = controller.raw_axis(idx)
             bar_width = int(abs(val) * 30)
             color = (100, 200, 100) if val >= 0 else (255, 100, 100)
-            t = small_font.render(f"{label[:6]}: {val:+.1f}", True, (200, 200, 200))
+            t = text_cache.render(small_font, f"{label[:6]}: {val:+.1f}", (200, 200, 200))
             surface.blit(t, (block2.x + 8, y))
             pygame.draw.rect(surface, color, (block2.x + 70, y + 2, bar_width, 12))
             y += 18
 
     # ---- Bloque: Señales RAW (Hex / Bin) ----
-    block3 = pygame.Rect(8, block2.y + block2.height + 12, LEFT_PANEL_W - 16, 110)
-    pygame.draw.rect(surface, (18, 18, 28), block3, border_radius=6)
-    pygame.draw.rect(surface, (80, 160, 200), block3, 1, border_radius=6)
-    h3 = small_font.render("Señales RAW (Hex / Bin)", True, (140, 220, 240))
-    surface.blit(h3, (block3.x + 8, block3.y + 4))
-
+    block3 = PANEL_RAW_RECT
     ry = block3.y + 22
     # Mostrar las últimas señales RAW (más recientes abajo)
-    raw_to_show = raw_signals[-5:]
+    raw_to_show = raw_signals.packets(RAW_MAX)
+    # Volcado con atlas de glifos: blits en lugar de rasterizar texto cada frame
+    hex_atlas = glyph_atlas(small_font, (200, 200, 200))
+    bin_atlas = glyph_atlas(small_font, (120, 180, 180))
     for raw in raw_to_show:
-        try:
-            hex_str = ' '.join(f"{b:02X}" for b in raw)
-            bin_str = ' '.join(f"{b:08b}" for b in raw)
-            t1 = small_font.render(hex_str, True, (200, 200, 200))
-            surface.blit(t1, (block3.x + 8, ry))
-            ry += 16
-            t2 = small_font.render(bin_str, True, (120, 180, 180))
-            surface.blit(t2, (block3.x + 10, ry))
-            ry += 14
-        except Exception:
-            continue
+        hex_atlas.draw_bytes(surface, raw, (block3.x + 8, ry))
+        ry += 16
+        bin_atlas.draw_bytes(surface, raw, (block3.x + 10, ry), binary=True)
+        ry += 14
 
     # ---- Bloque: Estado Interno (Ciclo Von Neumann) ----
-    block4 = pygame.Rect(8, block3.y + block3.height + 12, LEFT_PANEL_W - 16, 160)
-    pygame.draw.rect(surface, (18, 18, 28), block4, border_radius=6)
-    pygame.draw.rect(surface, (200, 160, 80), block4, 1, border_radius=6)
-    h4 = small_font.render("Estado Interno (Ciclo Von Neumann)", True, (240, 200, 140))
-    surface.blit(h4, (block4.x + 8, block4.y + 4))
+    block4 = PANEL_STATE_RECT
 
     ry = block4.y + 22
     # Mostrar snapshot de kernel_memory
@@ -544,8 +835,8 @@ def draw_kernel_panel(surface, pause_buttons):
         lines.append(f"LEN={km.get('len_snake', '-')}")
         lines.append(f"DIR={km.get('direction', '-')}")
         lines.append(f"NEXT={km.get('next_direction', '-')}")
-        lines.append(f"SPD={km.get('speed', '-')}")
-        lines.append(f"FRAME={km.get('frame_count', '-')}")
+        lines.append(f"SPD={km.get('speed', 0):.1f} c/s")
+        lines.append(f"TICK={km.get('tick', '-')}")
         im = km.get('input_mute', 0)
         lines.append(f"MUTE(ms)={max(0, int(im))}")
         lines.append(f"RAW={km.get('raw_count', 0)}")
@@ -554,30 +845,231 @@ def draw_kernel_panel(surface, pause_buttons):
         lines = ["-"]
 
     for ln in lines[:8]:
-        t = small_font.render(ln, True, (200, 200, 200))
+        t = text_cache.render(small_font, ln, (200, 200, 200))
         surface.blit(t, (block4.x + 8, ry))
         ry += 16
 
     # Info de pausa
+    surface.set_clip(PANEL_PAUSE_LABEL_RECT.clip(prev_clip))
     txt = ", ".join(f"B{b}" for b in pause_buttons) if pause_buttons else "-"
-    bottom_label = small_font.render(f"Pausa: {txt}", True, (140, 140, 200))
+    bottom_label = text_cache.render(small_font, f"Pausa: {txt}", (140, 140, 200))
     surface.blit(bottom_label, (8, SCREEN_H - 30))
+    surface.set_clip(prev_clip)
+
+# ----------------- CAPAS ESTÁTICAS -----------------
+
+def draw_board(surface, origin_x, origin_y):
+    """Tablero tipo ajedrez con dos tonos de verde y su borde."""
+    light_green = (40, 160, 60)
+    dark_green = (20, 110, 35)
+    cell_margin = 0
+    for gx in range(GRID_SIZE):
+        for gy in range(GRID_SIZE):
+            col = light_green if ((gx + gy) % 2 == 0) else dark_green
+            rx = origin_x + gx * CELL_SIZE + cell_margin
+            ry = origin_y + gy * CELL_SIZE + cell_margin
+            rw = CELL_SIZE - cell_margin * 2
+            rh = CELL_SIZE - cell_margin * 2
+            pygame.draw.rect(surface, col, (rx, ry, rw, rh))
+    # Borde del área de juego
+    pygame.draw.rect(surface, (10, 40, 20), (origin_x, origin_y, GAME_W, GAME_H), 4, border_radius=6)
+
+def draw_footer(surface):
+    """Footer para el DualSense."""
+    footer_rect = pygame.Rect(0, GAME_H, SCREEN_W, FOOTER_H)
+    pygame.draw.rect(surface, FOOTER_COLOR, footer_rect)
+    pygame.draw.line(surface, (40, 40, 60), (0, GAME_H), (SCREEN_W, GAME_H), 2)
+
+def draw_static_background(surface):
+    """Todo lo que no cambia entre frames durante la partida."""
+    surface.fill((8, 8, 14))
+    draw_kernel_panel_chrome(surface)
+    draw_board(surface, LEFT_PANEL_W, 0)
+    draw_footer(surface)
+
+def blit_static_background(surface):
+    """Copia la capa estática cacheada (se redibuja sólo si cambia tamaño o GRID_SIZE)."""
+    layer = static_layers.get(
+        "background", (SCREEN_W, SCREEN_H), (SCREEN_W, SCREEN_H, GRID_SIZE), draw_static_background
+    )
+    surface.blit(layer, (0, 0))
+
+# ----------------- ATLAS DE SPRITES -----------------
+# Cabeza, cuerpo, cola, comida y corazones se pre-renderizan una vez en un
+# atlas (static_layers) y el juego sólo hace blits.
+SEG_SIZE = CELL_SIZE - 4             # lado de un segmento (sin margen)
+SPRITE_PAD = CELL_SIZE // 6 + 2      # margen para borde, brillo y punta de la cola
+SPRITE_BOX = SEG_SIZE + 2 * SPRITE_PAD
+BODY_BUCKETS = 21                    # el tono del cuerpo deja de cambiar en el segmento 20
+FOOD_FRAMES = 24                     # fotogramas del pulso de la comida (600 ms)
+FOOD_PULSE_MS = 600
+HEART_SIZE = 12
+HEAD_DIRS = (UP, RIGHT, DOWN, LEFT)  # cabeza: fila 0, en este orden
+TAIL_DIRS = (None, UP, RIGHT, DOWN, LEFT)  # cola: fila 2 (None = sin punta)
+
+# Ángulo (antihorario) para girar la cabeza dibujada mirando hacia arriba
+HEAD_ROTATION = {UP: 0, RIGHT: -90, DOWN: 180, LEFT: 90}
+
+def _sprite_rect(row, col):
+    """Rect de un sprite de la rejilla de SPRITE_BOX en el atlas."""
+    return pygame.Rect(col * SPRITE_BOX, row * SPRITE_BOX, SPRITE_BOX, SPRITE_BOX)
+
+FOOD_ROW_Y = 3 * SPRITE_BOX
+HEART_ROW_Y = FOOD_ROW_Y + CELL_SIZE
+SPRITE_ATLAS_SIZE = (
+    max(BODY_BUCKETS * SPRITE_BOX, FOOD_FRAMES * CELL_SIZE),
+    HEART_ROW_Y + HEART_SIZE,
+)
+# La cabeza usa la caja completa (borde y brillo sobresalen); cuerpo y cola
+# sólo el segmento, para no mezclar alfa de píxeles transparentes.
+HEAD_RECTS = {d: _sprite_rect(0, i) for i, d in enumerate(HEAD_DIRS)}
+BODY_RECTS = [_sprite_rect(1, i).inflate(-2 * SPRITE_PAD, -2 * SPRITE_PAD) for i in range(BODY_BUCKETS)]
+TAIL_RECTS = {d: _sprite_rect(2, i).inflate(-2 * SPRITE_PAD, -2 * SPRITE_PAD) for i, d in enumerate(TAIL_DIRS)}
+FOOD_RECTS = [pygame.Rect(i * CELL_SIZE, FOOD_ROW_Y, CELL_SIZE, CELL_SIZE) for i in range(FOOD_FRAMES)]
+HEART_RECT = pygame.Rect(0, HEART_ROW_Y, HEART_SIZE, HEART_SIZE)
+
+def draw_head_sprite(surface):
+    """Cabeza mirando hacia arriba en una caja de SPRITE_BOX."""
+    seg_rect = pygame.Rect(SPRITE_PAD, SPRITE_PAD, SEG_SIZE, SEG_SIZE)
+    # Outer border (dark blue)
+    pygame.draw.rect(surface, (6, 18, 60), seg_rect.inflate(4, 4), border_radius=8)
+    # Main head gradient (top -> bottom, light blue to deep blue)
+    top_col = (180, 220, 255)
+    bot_col = (30, 80, 200)
+    for yy in range(seg_rect.height):
+        t = yy / max(1, seg_rect.height - 1)
+        r = int(top_col[0] * (1 - t) + bot_col[0] * t)
+        g = int(top_col[1] * (1 - t) + bot_col[1] * t)
+        b = int(top_col[2] * (1 - t) + bot_col[2] * t)
+        pygame.draw.line(surface, (r, g, b), (seg_rect.x, seg_rect.y + yy), (seg_rect.right - 1, seg_rect.y + yy))
+    pygame.draw.rect(surface, (220, 240, 255), seg_rect, 2, border_radius=8)
+    # Ojos (oscuro)
+    eye_x = seg_rect.x + seg_rect.width // 3
+    eye_y = seg_rect.y + seg_rect.height // 3
+    pygame.gfxdraw.filled_circle(surface, int(eye_x), int(eye_y), 3, (8, 12, 18))
+    pygame.gfxdraw.filled_circle(surface, int(eye_x + seg_rect.width // 3), int(eye_y), 3, (8, 12, 18))
+    # Brillo superior (sutil)
+    shine = pygame.Surface((seg_rect.width, max(2, seg_rect.height // 3)), pygame.SRCALPHA)
+    pygame.draw.ellipse(shine, (255, 255, 255, 36), (0, 0, seg_rect.width, seg_rect.height // 2))
+    surface.blit(shine, (seg_rect.x, seg_rect.y - seg_rect.height // 6))
+
+def draw_sprite_atlas(atlas):
+    """Dibuja todos los sprites del juego en atlas (SRCALPHA, SPRITE_ATLAS_SIZE)."""
+    # Cabeza por dirección: se dibuja una vez mirando arriba y se gira
+    head_up = pygame.Surface((SPRITE_BOX, SPRITE_BOX), pygame.SRCALPHA)
+    draw_head_sprite(head_up)
+    for direction, rect in HEAD_RECTS.items():
+        atlas.blit(pygame.transform.rotate(head_up, HEAD_ROTATION[direction]), rect)
+
+    # Cuerpo por profundidad (más oscuro hacia la cola)
+    for i, seg_rect in enumerate(BODY_RECTS):
+        depth = int(180 - min(100, i * 5))
+        body_color = (30, 80, max(80, depth))
+        pygame.draw.rect(atlas, body_color, seg_rect, border_radius=4)
+        pygame.draw.rect(atlas, (90, 140, 220), seg_rect, 1, border_radius=4)
+
+    # Cola por orientación (dirección desde el penúltimo segmento)
+    for direction, seg_rect in TAIL_RECTS.items():
+        tail_color = (10, 30, 120)
+        pygame.draw.rect(atlas, tail_color, seg_rect, border_radius=4)
+        pygame.draw.rect(atlas, (40, 80, 160), seg_rect, 1, border_radius=4)
+        # Small tip circle indicating tail end (darker blue)
+        if direction is not None:
+            dx_t, dy_t = direction
+            tip_x = seg_rect.centerx + dx_t * (CELL_SIZE // 4)
+            tip_y = seg_rect.centery + dy_t * (CELL_SIZE // 4)
+            pygame.gfxdraw.filled_circle(atlas, int(tip_x), int(tip_y), 3, (5, 10, 40))
+
+    # Comida: FOOD_FRAMES fotogramas del pulso
+    for i, rect in enumerate(FOOD_RECTS):
+        pulse = abs(i * FOOD_PULSE_MS / FOOD_FRAMES - FOOD_PULSE_MS / 2) / (FOOD_PULSE_MS / 2)
+        food_color = (
+            int(255 * (0.6 + 0.4 * pulse)),
+            int(100 * (0.6 + 0.4 * pulse)),
+            int(80 * (0.6 + 0.4 * pulse))
+        )
+        food_rect = rect.inflate(-4, -4)
+        pygame.draw.ellipse(atlas, food_color, food_rect)
+        pygame.draw.ellipse(atlas, (255, 150, 100), food_rect, 2)
+        pygame.gfxdraw.filled_circle(atlas, food_rect.centerx, food_rect.centery - CELL_SIZE // 8, 3, (255, 200, 150))
+
+    # Corazón (vidas): dos círculos y un triángulo
+    hx, hy = HEART_RECT.topleft
+    heart_color = (220, 20, 60)
+    dark_color = (110, 20, 30)
+    pygame.gfxdraw.filled_circle(atlas, hx + 3, hy + 3, 3, heart_color)
+    pygame.gfxdraw.filled_circle(atlas, hx + 8, hy + 3, 3, heart_color)
+    pts = [(hx + 1, hy + 5), (hx + 10, hy + 5), (hx + 5, hy + 11)]
+    pygame.draw.polygon(atlas, heart_color, pts)
+    pygame.draw.polygon(atlas, dark_color, pts, 1)
+
+def sprite_atlas():
+    """Atlas de sprites (se regenera si cambia CELL_SIZE o al redimensionar)."""
+    return static_layers.get("sprites", SPRITE_ATLAS_SIZE, (CELL_SIZE,), draw_sprite_atlas, alpha=True)
+
+def food_frame(now_ms):
+    """Rect del fotograma del pulso de la comida para el instante now_ms."""
+    return FOOD_RECTS[int(now_ms % FOOD_PULSE_MS) * FOOD_FRAMES // FOOD_PULSE_MS]
+
+# ----------------- SUAVIZADO DE LA SERPIENTE -----------------
+SMOOTHING = 0.32                    # fracción del camino recorrida por frame a 60 fps
+SMOOTHING_FRAME_MS = 1000.0 / 60
+
+class SegmentPositions:
+    """Posiciones de dibujo (px) de los segmentos, suavizadas hacia su celda.
+
+    pos es un array (n, 2) float32 alineado con engine.snake (cabeza
+    primero). update() acerca todos los segmentos a su celda en una sola
+    operación; la fracción recorrida depende del tiempo transcurrido, así
+    que el movimiento se ve igual a 60 Hz que a 144 Hz.
+    """
+
+    def __init__(self, origin_x, origin_y, snake):
+        self.origin = np.array((origin_x + 2, origin_y + 2), np.float32)
+        self.reset(snake)
+
+    def __len__(self):
+        return len(self.pos)
+
+    def targets(self, snake):
+        """Esquina superior izquierda (px) de la celda de cada segmento."""
+        cells = np.fromiter(chain.from_iterable(snake), np.float32, 2 * len(snake))
+        return cells.reshape(-1, 2) * CELL_SIZE + self.origin
+
+    def reset(self, snake):
+        """Coloca cada segmento directamente en su celda."""
+        self.pos = self.targets(snake)
+
+    def update(self, snake, elapsed_ms):
+        """Avanza elapsed_ms de suavizado y devuelve las posiciones."""
+        target = self.targets(snake)
+        n = len(target)
+        pos = self.pos
+        if len(pos) < n:
+            # Segmentos nuevos en la cabeza: salen de donde estaba la cabeza
+            head = pos[:1] if len(pos) else target[:1]
+            pos = np.concatenate((np.repeat(head, n - len(pos), axis=0), pos))
+        elif len(pos) > n:
+            pos = pos[:n]
+        factor = 1.0 - (1.0 - SMOOTHING) ** (elapsed_ms / SMOOTHING_FRAME_MS)
+        pos += (target - pos) * factor
+        self.pos = pos
+        return pos
 
 # -----------------  MENÚ PRINCIPAL -----------------
 def draw_menu(selected_index):
     canvas.fill((5, 5, 12))
-    title = big_font.render("S N A K E", True, (255, 255, 255))
+    title = text_cache.render(big_font, "S N A K E", (255, 255, 255))
     canvas.blit(title, (SCREEN_W // 2 - title.get_width() // 2, 80))
 
     options = ["Jugar", "Salir"]
     for i, text in enumerate(options):
         color = (255, 255, 0) if i == selected_index else (200, 200, 200)
-        t = font.render(text, True, color)
+        t = text_cache.render(font, text, color)
         canvas.blit(t, (SCREEN_W // 2 - t.get_width() // 2, 220 + i * 60))
 
-    info = small_font.render(
-        "Mover: ↑/↓/←/→ o D-Pad/L-Stick  |  Seleccionar: Enter / X",
-        True, (150, 150, 150)
+    info = text_cache.render(
+        small_font, "Mover: ↑/↓/←/→ o D-Pad/L-Stick  |  Seleccionar: Enter / X", (150, 150, 150)
     )
     canvas.blit(info, (SCREEN_W // 2 - info.get_width() // 2, SCREEN_H - 60))
 
@@ -590,7 +1082,7 @@ def menu_loop():
         draw_menu(selected)
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                pygame.quit(); sys.exit()
+                quit_pygame(); sys.exit()
 
             # Teclado
             if event.type == pygame.KEYDOWN:
@@ -634,6 +1126,8 @@ def menu_loop():
                         last_move = now
                         menu_sound.play()
 
+        process_axis_events()
+
         # Movimiento con stick
         if use_controller:
             axis_val = joystick.get_axis(1)
@@ -649,7 +1143,15 @@ def menu_loop():
         clock.tick(60)
 
 # ----------------- MENÚ DE PAUSA -----------------
-def pause_menu():
+def pause_menu(scrub=None):
+    """Menú de pausa; devuelve "resume" o "menu".
+
+    scrub: función scrub(steps) que avanza o retrocede la partida mostrada
+    (la reproducción o el historial de ticks), la vuelve a dibujar en el
+    canvas y devuelve el texto de estado. ←/→ (o D-pad izquierda/derecha)
+    la llaman con steps = -1 / +1, o -10 / +10 con Shift; scrub(0) sólo
+    devuelve el texto.
+    """
     selected = 0
     last_move = 0
     cooldown = 200
@@ -657,16 +1159,22 @@ def pause_menu():
     # Limpiar log de eventos al entrar en pausa
     event_log.clear()
 
-    # Pantalla completa (toda la ventana lógica)
+    # Pantalla completa (toda la ventana lógica) sobre el último frame de juego
     overlay = pygame.Surface((SCREEN_W, SCREEN_H), pygame.SRCALPHA)
+    overlay.fill((0, 0, 0, 180))
+    scrub_status = scrub(0) if scrub else None
+    background = canvas.copy()
 
     while True:
         # Dibujar fondo transparente sobre *toda* la ventana
-        overlay.fill((0, 0, 0, 180))
+        canvas.blit(background, (0, 0))
         canvas.blit(overlay, (0, 0))
+        if scrub_status:
+            t = text_cache.render(small_font, scrub_status, (160, 255, 140))
+            canvas.blit(t, (SCREEN_W // 2 - t.get_width() // 2, SCREEN_H // 2 + 80))
 
         # Título centrado
-        title = big_font.render("PAUSADO", True, (255, 255, 255))
+        title = text_cache.render(big_font, "PAUSADO", (255, 255, 255))
         canvas.blit(title, (
             SCREEN_W // 2 - title.get_width() // 2,
             SCREEN_H // 2 - 150
@@ -676,19 +1184,24 @@ def pause_menu():
         options = ["Reanudar", "Salir al menú"]
         for i, txt in enumerate(options):
             color = (255, 255, 0) if i == selected else (220, 220, 220)
-            t = font.render(txt, True, color)
+            t = text_cache.render(font, txt, color)
             canvas.blit(
                 t,
                 (SCREEN_W // 2 - t.get_width() // 2, SCREEN_H // 2 - 40 + i * 50)
             )
 
+        # Desplazamiento pedido en la reproducción (ticks) en este frame
+        scrub_delta = 0
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                pygame.quit(); sys.exit()
+                quit_pygame(); sys.exit()
 
             # Teclado
             if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_UP:
+                if scrub and event.key in (pygame.K_LEFT, pygame.K_RIGHT):
+                    steps = 10 if event.mod & pygame.KMOD_SHIFT else 1
+                    scrub_delta += steps if event.key == pygame.K_RIGHT else -steps
+                elif event.key == pygame.K_UP:
                     selected = (selected - 1) % 2
                     menu_sound.play()
                 elif event.key == pygame.K_DOWN:
@@ -706,6 +1219,9 @@ def pause_menu():
                     if event.button == 0:  # X
                         menu_sound.play()
                         return "resume" if selected == 0 else "menu"
+                    # D-pad izquierda / derecha (13 / 14)
+                    if scrub and event.button in (13, 14):
+                        scrub_delta += 1 if event.button == 14 else -1
 
                 # D-pad mapeado a botones (11 arriba, 12 abajo)
                 if event.type == pygame.JOYBUTTONDOWN and event.button in (11, 12):
@@ -735,6 +1251,8 @@ def pause_menu():
                 if event.type == pygame.JOYHATMOTION:
                     hat_x, hat_y = event.value
                     now = pygame.time.get_ticks()
+                    if scrub and hat_x:
+                        scrub_delta += hat_x
                     if hat_y == 1 and now - last_move > cooldown:
                         selected = (selected - 1) % 2
                         last_move = now
@@ -744,11 +1262,217 @@ def pause_menu():
                         last_move = now
                         menu_sound.play()
 
+        if scrub_delta:
+            menu_sound.play()
+            scrub_status = scrub(scrub_delta)
+            background = canvas.copy()
+
+        process_axis_events()
         present_frame()
         clock.tick(60)
 
+# ----------------- FRAME DE JUEGO -----------------
+GAME_ORIGIN_X = LEFT_PANEL_W
+GAME_ORIGIN_Y = 0
+
+def update_kernel_memory(engine, particles, draw_positions):
+    """Actualiza el snapshot del kernel (estado interno) que muestra el panel."""
+    try:
+        kernel_memory['score'] = engine.score
+        kernel_memory['lives'] = engine.lives
+        kernel_memory['len_snake'] = len(engine.snake)
+        kernel_memory['direction'] = engine.direction
+        kernel_memory['next_direction'] = engine.next_direction
+        kernel_memory['speed'] = engine.speed
+        kernel_memory['tick'] = engine.ticks
+        kernel_memory['input_mute'] = input_mute_until - pygame.time.get_ticks()
+        kernel_memory['raw_count'] = len(raw_signals)
+        kernel_memory['particles'] = len(particles)
+        kernel_memory['draw_positions'] = len(draw_positions)
+        # Snapshot of axis short form
+        kernel_memory['axes'] = {k: round(v, 2) for k, v in enumerate(controller.axes.tolist())}
+        kernel_memory['buttons_pressed'] = controller.pressed_buttons()
+    except Exception:
+        pass
+
+def draw_game_frame(surface, engine, draw_positions, particles, elapsed_ms, pause_buttons, dirty_rects):
+    """Dibuja un frame de la partida (panel, comida, serpiente, partículas, HUD
+    y mando) en surface y añade las zonas cambiadas a dirty_rects.
+
+    elapsed_ms: tiempo desde el frame anterior (suavizado de los segmentos).
+    """
+    snake = engine.snake
+    foods = engine.foods
+    score = engine.score
+    lives = engine.lives
+
+    # Capa estática (fondo, marcos del panel, tablero y footer): un solo blit
+    profiler.start("board")
+    blit_static_background(surface)
+    profiler.stop("board")
+
+    # Panel kernel/HID (contenido dinámico, recortado a sus dirty rects)
+    profiler.start("draw_kernel_panel")
+    draw_kernel_panel(surface, pause_buttons)
+    dirty_rects.add(PANEL_CONTENT_RECT)
+    dirty_rects.add(PANEL_PAUSE_LABEL_RECT)
+    profiler.stop("draw_kernel_panel")
+
+    # Dibujar comida (efecto pulsante, fotogramas del atlas)
+    profiler.start("food")
+    sprites = sprite_atlas()
+    food_src = food_frame(pygame.time.get_ticks())
+    for rect in surface.blits([
+        (sprites, (GAME_ORIGIN_X + food_x * CELL_SIZE, GAME_ORIGIN_Y + food_y * CELL_SIZE), food_src)
+        for food_x, food_y in foods
+    ]):
+        dirty_rects.add(rect)
+    profiler.stop("food")
+
+    # Actualizar posiciones dibujadas (suavizado) y dibujar serpiente
+    profiler.start("snake")
+    positions = draw_positions.update(snake, elapsed_ms).astype(np.int32).tolist()
+    tail_index = len(snake) - 1
+    # Dirección de la punta de la cola (desde el penúltimo segmento)
+    tail_dir = None
+    if len(snake) >= 2:
+        tail_dir = (snake[-1][0] - snake[-2][0], snake[-1][1] - snake[-2][1])
+    # Tras morir la serpiente parpadea (100 ms visible / 100 ms oculta)
+    snake_visible = not (engine.dead or engine.game_over) or int(engine.death_ms // 100) % 2 == 0
+    snake_blits = []
+    if snake_visible:
+        head_x, head_y = positions[0]
+        snake_blits.append((sprites, (head_x - SPRITE_PAD, head_y - SPRITE_PAD),
+                            HEAD_RECTS.get(engine.direction, HEAD_RECTS[UP])))
+        snake_blits.extend(
+            (sprites, pos, BODY_RECTS[min(i, BODY_BUCKETS - 1)])
+            for i, pos in enumerate(positions[1:tail_index], 1)
+        )
+        if tail_index > 0:
+            snake_blits.append((sprites, positions[tail_index], TAIL_RECTS.get(tail_dir, TAIL_RECTS[None])))
+    for rect in surface.blits(snake_blits):
+        dirty_rects.add(rect)
+    profiler.stop("snake")
+
+    # Dibujar partículas y actualizar
+    profiler.start("particles")
+    particles.update()
+    for rect in particles.draw(surface):
+        dirty_rects.add(rect)
+    profiler.stop("particles")
+
+    # Score y vidas (estilo retro verde)
+    profiler.start("hud")
+    score_text = text_cache.render(font, f"SCORE: {score} | LONGITUD: {len(snake)}", (160, 255, 140))
+    dirty_rects.add(surface.blit(score_text, (
+        GAME_ORIGIN_X + GAME_W // 2 - score_text.get_width() // 2,
+        8
+    )))
+
+    # Dibujar vidas como corazones pixel-art en la esquina superior izquierda del área de juego
+    heart_base_x = GAME_ORIGIN_X + 8
+    heart_base_y = 8
+    heart_gap = 6
+    for rect in surface.blits([
+        (sprites, (heart_base_x + i * (CELL_SIZE // 2 + heart_gap), heart_base_y), HEART_RECT)
+        for i in range(lives)
+    ]):
+        dirty_rects.add(rect)
+    profiler.stop("hud")
+
+    # DualSense centrado en el footer
+    profiler.start("draw_dualsense")
+    ctrl_cx = SCREEN_W // 2
+    ctrl_cy = GAME_H + FOOTER_H // 2 + 5
+    dirty_rects.add(draw_dualsense(
+        surface, ctrl_cx, ctrl_cy,
+        max_w=SCREEN_W - 200,    # reduce ancho útil del SVG
+        max_h=(FOOTER_H - 60),   # reduce altura útil del SVG
+        controller=controller
+    ))
+    profiler.stop("draw_dualsense")
+
+def draw_history_tick(state, pause_buttons):
+    """Dibuja en el canvas un tick del historial (TickState): tablero, panel
+    HID (el registro tal como estaba en ese tick), mando y kernel_memory.
+
+    Las vistas HID y el mando vuelven a su estado en vivo al terminar.
+    """
+    live_mark = event_log.mark
+    live_raw = controller.raw.copy()
+    live_axes = controller.axes.copy()
+    live_buttons = controller.buttons
+    event_log.mark = state.hid_mark
+    event_log.until = raw_signals.until = state.hid_total
+    controller.raw[:] = state.raw
+    controller.axes[:] = state.axes
+    controller.buttons = state.buttons
+    try:
+        positions = SegmentPositions(GAME_ORIGIN_X, GAME_ORIGIN_Y, state.snake)
+        no_particles = ParticlePool(capacity=0)
+        update_kernel_memory(state, no_particles, positions)
+        draw_game_frame(canvas, state, positions, no_particles, 0.0, pause_buttons, DirtyRects())
+    finally:
+        event_log.mark = live_mark
+        event_log.until = raw_signals.until = None
+        controller.raw[:] = live_raw
+        controller.axes[:] = live_axes
+        controller.buttons = live_buttons
+
+# Overlay del profiler (arriba a la derecha del tablero); los percentiles
+# se recalculan cada PROFILER_REFRESH frames
+PROFILER_REFRESH = 30
+PROFILER_RECT = pygame.Rect(GAME_ORIGIN_X + GAME_W - 296, 36, 288, 18 * (len(PROFILE_STAGES) + 2) + 8)
+profiler_lines = []
+
+def draw_profiler_overlay(surface):
+    """p50 / p95 / p99 (ms) de cada etapa del frame; devuelve el rect dibujado."""
+    if not profiler_lines or profiler.frames % PROFILER_REFRESH == 0:
+        stats = profiler.percentiles()
+        profiler_lines[:] = [f"{'etapa (ms)':<16}{'p50':>6}{'p95':>6}{'p99':>6}"]
+        profiler_lines.extend(
+            f"{name[:16]:<16}{p50:6.2f}{p95:6.2f}{p99:6.2f}" for name, (p50, p95, p99) in stats.items()
+        )
+    panel = static_layers.get("profiler", PROFILER_RECT.size, None,
+                              lambda s: s.fill((0, 0, 0, 190)), alpha=True)
+    surface.blit(panel, PROFILER_RECT)
+    atlas = glyph_atlas(small_font, (160, 255, 140))
+    y = PROFILER_RECT.y + 4
+    for line in profiler_lines:
+        atlas.draw(surface, line, (PROFILER_RECT.x + 8, y))
+        y += 18
+    return PROFILER_RECT
+
 # ----------------- LOOP DE JUEGO -----------------
-def game_loop(mode):
+def game_loop(mode, replay_path=None):
+    """Una partida: graba la sesión si hay RECORD_PATH, o reproduce replay_path."""
+    global session_recorder
+    replay = None
+    if replay_path:
+        reader = SessionReader(replay_path)
+        if (reader.grid_w, reader.grid_h) != (GRID_SIZE, GRID_SIZE):
+            raise ValueError(f"{replay_path}: grabada con tablero {reader.grid_w}x{reader.grid_h}")
+        seed = reader.seed
+        replay = ReplayFeed(reader)
+    else:
+        # Semilla explícita para poder reproducir la partida
+        seed = int.from_bytes(os.urandom(8), "little") >> 1
+    engine = SnakeEngine(seed=seed)
+    if RECORD_PATH and replay is None:
+        session_recorder = SessionRecorder(RECORD_PATH, seed, GRID_SIZE, GRID_SIZE)
+    try:
+        play_session(mode, engine, replay)
+    finally:
+        if session_recorder is not None:
+            session_recorder.close(engine.ticks)
+            print(f"Sesión grabada en {RECORD_PATH} ({session_recorder.records} entradas)")
+            session_recorder = None
+        if replay is not None:
+            replay.reader.close()
+
+def play_session(mode, engine, replay=None):
+    """Bucle de la partida. Con replay (ReplayFeed) las entradas de juego
+    salen de la grabación en lugar del teclado y el mando."""
 
     # AUTO-DETECTAR BOTÓN OPTIONS
     pause_buttons = []
@@ -763,247 +1487,212 @@ def game_loop(mode):
     """
     Juego de Snake en un mapa de 10x10
     """
-    global axis_states, button_states
     # Limpiar log de eventos al iniciar la partida
     event_log.clear()
 
     # Estados HID
+    controller.reset()
     if use_controller:
-        axis_states = {i: 0.0 for i in range(joystick.get_numaxes())}
-        button_states = {i: False for i in range(joystick.get_numbuttons())}
-        # inicializar valores previos para debounce
-        last_axis_values = {i: 0.0 for i in range(joystick.get_numaxes())}
-        # Inicializar hat_states (asumir un hat index 0 si existe)
-        hat_states = {0: (0, 0)} if joystick.get_numhats() > 0 else {}
         pause_buttons = [9, 10, 16]  # distintos drivers mapean Options aquí
     else:
-        axis_states = {}
-        button_states = {}
         pause_buttons = []
 
-    # Vidas
-    lives = INITIAL_LIVES
+    # Zonas del canvas que cambian cada frame (el primero se presenta completo)
+    dirty_rects = DirtyRects()
 
-    # Inicializar Snake
-    snake = [(5, 5), (4, 5), (3, 5)]  # Lista de segmentos (cabeza primero)
-    direction = (1, 0)  # Dirección (dx, dy)
-    next_direction = (1, 0)
-    food = (7, 7)
-    score = 0
-    game_over_flag = False
-    
-    # Velocidad del juego (frames entre movimientos)
-    speed = 10
-    frame_count = 0
+    timestep.reset()
+    last_time = time.perf_counter()
     # Partículas al comer (inicializadas más abajo cuando conocemos origen de juego)
-    particles = []  # cada partícula: dict{x,y,vx,vy,life,maxlife,clr,size}
+    particles = ParticlePool()
     
-    # Controles
-    last_move_time = pygame.time.get_ticks()
-    move_cooldown = 100  # ms para evitar múltiples movimientos rápidos
-
-    game_origin_x = LEFT_PANEL_W
-    game_origin_y = 0
+    # Controles: todas las entradas de juego pasan por apply_input(); los
+    # giros se encolan en el motor, que aplica uno por movimiento.
+    # live_input: teclado / mando (False al reproducir una grabación).
+    # sampled: las del mando llegan por input_sampler (ver bucle de ticks).
+    live_input = replay is None
+    sampled = live_input and input_sampler is not None
+    stick_axes = {}      # último valor procesado de cada eje del stick
+    sampled_raw = {}     # último valor crudo de cada eje muestreado
+    if input_sampler is not None:
+        input_sampler.clear()
+
+    game_origin_x = GAME_ORIGIN_X
+    game_origin_y = GAME_ORIGIN_Y
 
     # Posiciones usadas para dibujar suavemente (pixeles)
-    draw_positions = [
-        (game_origin_x + x * CELL_SIZE + 2, game_origin_y + y * CELL_SIZE + 2)
-        for (x, y) in snake
-    ]
+    draw_positions = SegmentPositions(game_origin_x, game_origin_y, engine.snake)
+
+    # Últimos HISTORY_TICKS ticks, para revisarlos desde la pausa (en vivo)
+    history = TickHistory(HISTORY_TICKS, n_axes=controller.n_axes) if replay is None else None
+    history_view = None      # tick del historial mostrado en la pausa
+
+    def scrub_replay(steps):
+        """Salto en la reproducción desde la pausa (ver pause_menu)."""
+        if steps:
+            seek_replay(engine, replay, stick_axes, engine.ticks + steps * SCRUB_TICKS)
+            draw_positions.reset(engine.snake)
+            particles.clear()
+            update_kernel_memory(engine, particles, draw_positions)
+            draw_game_frame(canvas, engine, draw_positions, particles, 0.0, pause_buttons, DirtyRects())
+        total = f" / {replay.end_tick * LOGIC_STEP_MS / 1000:.1f}" if replay.end_tick is not None else ""
+        return f"Replay {engine.sim_ms / 1000:.1f}{total} s   ←/→: ±{SCRUB_TICKS * LOGIC_STEP_MS / 1000:g} s"
+
+    def scrub_history(steps):
+        """Recorre el historial desde la pausa; el motor no cambia (al
+        reanudar se sigue desde el presente)."""
+        nonlocal history_view
+        if not len(history):
+            return "Historial vacío"
+        if steps == 0:
+            history_view = history.last_tick
+        else:
+            history_view = max(history.first_tick, min(history.last_tick, history_view + steps))
+            draw_history_tick(history.state(history_view), pause_buttons)
+        return (f"Tick {history_view} ({history_view - history.last_tick:+d})   "
+                f"←/→: ±1 tick (Shift ±10)   {history.nbytes() / 1024:.1f} KiB")
+
+    scrub = scrub_replay if replay is not None else scrub_history
+
+    def pause_game():
+        """Menú de pausa (mando o teclado); devuelve su resultado. Al volver
+        no cuenta el tiempo en pausa y redibuja todo (el overlay tapó el canvas)."""
+        nonlocal last_time
+        menu_sound.play()
+        result = pause_menu(scrub)
+        timestep.reset()
+        last_time = time.perf_counter()
+        dirty_rects.invalidate_all()
+        profiler.restart_frame()
+        if input_sampler is not None:
+            input_sampler.clear()
+        return result
 
     while True:
+        profiler.start("events")
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                pygame.quit(); sys.exit()
+                quit_pygame(); sys.exit()
+
+            if event.type == pygame.VIDEORESIZE:
+                # El formato de la ventana puede cambiar: regenerar capas
+                # y presentar el siguiente frame completo
+                static_layers.invalidate()
+                dirty_rects.invalidate_all()
 
             if use_controller:
+                profiler.start("handle_joystick_events")
                 handle_joystick_events(event)
+                profiler.stop("handle_joystick_events")
                 if event.type == pygame.JOYBUTTONDOWN and event.button in pause_buttons:
-                    menu_sound.play()
-                    result = pause_menu()
-                    if result == "menu":
+                    if pause_game() == "menu":
                         return
 
-                # Controles con D-pad (HAT)
-                if event.type == pygame.JOYHATMOTION:
-                    hat_x, hat_y = event.value
-                    now = pygame.time.get_ticks()
-                    if now - last_move_time > move_cooldown:
-                        if hat_y == 1 and direction != (0, 1):  # Arriba
-                            next_direction = (0, -1)
-                            last_move_time = now
-                        elif hat_y == -1 and direction != (0, -1):  # Abajo
-                            next_direction = (0, 1)
-                            last_move_time = now
-                        elif hat_x == -1 and direction != (1, 0):  # Izquierda
-                            next_direction = (-1, 0)
-                            last_move_time = now
-                        elif hat_x == 1 and direction != (-1, 0):  # Derecha
-                            next_direction = (1, 0)
-                            last_move_time = now
-
-                # Controles con botones (D-pad mapeado 11..14, face buttons 0..3, L1/R1)
-                if event.type == pygame.JOYBUTTONDOWN:
-                    btn = event.button
-                    now = pygame.time.get_ticks()
-                    # Movimientos D-pad mapeados como botones
-                    if now - last_move_time > move_cooldown:
-                        if btn == 11 and direction != (0, 1):  # DPad Arriba
-                            next_direction = (0, -1)
-                            last_move_time = now
-                        elif btn == 12 and direction != (0, -1):  # DPad Abajo
-                            next_direction = (0, 1)
-                            last_move_time = now
-                        elif btn == 13 and direction != (1, 0):  # DPad Izquierda
-                            next_direction = (-1, 0)
-                            last_move_time = now
-                        elif btn == 14 and direction != (-1, 0):  # DPad Derecha
-                            next_direction = (1, 0)
-                            last_move_time = now
-
-                    # Face buttons como movimiento (Triangle=3 Up, Circle=1 Right, X=0 Down, Square=2 Left)
-                    if now - last_move_time > move_cooldown:
-                        if btn == 3 and direction != (0, 1):
-                            next_direction = (0, -1)
-                            last_move_time = now
-                        elif btn == 1 and direction != (-1, 0):
-                            next_direction = (1, 0)
-                            last_move_time = now
-                        elif btn == 0 and direction != (0, -1):
-                            next_direction = (0, 1)
-                            last_move_time = now
-                        elif btn == 2 and direction != (1, 0):
-                            next_direction = (-1, 0)
-                            last_move_time = now
-
-                    # L1 / R1 para ajustar velocidad
-                    if btn == 9:  # L1
-                        speed = max(2, speed - 1)
-                        log_event(f"Speed: {speed}")
-                    elif btn == 10:  # R1
-                        speed = min(30, speed + 1)
-                        log_event(f"Speed: {speed}")
+                if live_input and not sampled:
+                    # Controles con D-pad (HAT)
+                    if event.type == pygame.JOYHATMOTION:
+                        apply_input(engine, KIND_HAT, 0, pack_hat(*event.value), stick_axes)
+
+                    # Controles con botones: D-pad mapeado 11..14, face buttons
+                    # (Triangle=3 Up, Circle=1 Right, X=0 Down, Square=2 Left), L1/R1
+                    if event.type == pygame.JOYBUTTONDOWN:
+                        btn = event.button
+                        if btn in DPAD_BUTTON_DIRS or btn in FACE_BUTTON_DIRS or btn in (9, 10):
+                            apply_input(engine, KIND_BUTTON, btn, 1.0, stick_axes)
 
             if event.type == pygame.KEYDOWN:
                 if event.key in (pygame.K_p, pygame.K_ESCAPE):
-                    menu_sound.play()
-                    result = pause_menu()
-                    if result == "menu":
+                    if pause_game() == "menu":
                         return
-                # Controles de teclado
-                if event.key == pygame.K_UP and direction != (0, 1):
-                    next_direction = (0, -1)
-                elif event.key == pygame.K_DOWN and direction != (0, -1):
-                    next_direction = (0, 1)
-                elif event.key == pygame.K_LEFT and direction != (1, 0):
-                    next_direction = (-1, 0)
-                elif event.key == pygame.K_RIGHT and direction != (-1, 0):
-                    next_direction = (1, 0)
-
-        # Controles con joystick izquierdo
-        if use_controller:
-            now = pygame.time.get_ticks()
-            lx = axis_states.get(0, 0.0)
-            ly = axis_states.get(1, 0.0)
-            
-            # Determinar dirección según stick izquierdo
-            if now - last_move_time > move_cooldown:
-                if abs(lx) > abs(ly):  # Movimiento horizontal dominante
-                    if lx < -0.5 and direction != (1, 0):
-                        next_direction = (-1, 0)
-                        last_move_time = now
-                    elif lx > 0.5 and direction != (-1, 0):
-                        next_direction = (1, 0)
-                        last_move_time = now
-                else:  # Movimiento vertical dominante
-                    if ly < -0.5 and direction != (0, 1):
-                        next_direction = (0, -1)
-                        last_move_time = now
-                    elif ly > 0.5 and direction != (0, -1):
-                        next_direction = (0, 1)
-                        last_move_time = now
-
-            # También aceptar stick derecho (axes 2/3) como alternativa
-            rx = axis_states.get(2, 0.0)
-            ry = axis_states.get(3, 0.0)
-            if now - last_move_time > move_cooldown:
-                if abs(rx) > abs(ry):
-                    if rx < -0.5 and direction != (1, 0):
-                        next_direction = (-1, 0)
-                        last_move_time = now
-                    elif rx > 0.5 and direction != (-1, 0):
-                        next_direction = (1, 0)
-                        last_move_time = now
-                else:
-                    if ry < -0.5 and direction != (0, 1):
-                        next_direction = (0, -1)
-                        last_move_time = now
-                    elif ry > 0.5 and direction != (0, -1):
-                        next_direction = (0, 1)
-                        last_move_time = now
-
-        # Actualizar dirección si no hace un giro de 180°
-        direction = next_direction
-
-        # Mover serpiente
-        frame_count += 1
-        if frame_count >= speed:
-            frame_count = 0
-            
-            # Calcular nueva cabeza
-            head_x, head_y = snake[0]
-            dx, dy = direction
-            new_head = (head_x + dx, new_head_y := head_y + dy)
-            
-            # Comprobar colisiones con bordes o consigo misma => perder vida
-            died = False
-            if new_head[0] < 0 or new_head[0] >= GRID_SIZE or new_head[1] < 0 or new_head[1] >= GRID_SIZE:
-                died = True
-            if new_head in snake:
-                died = True
-
-            if died:
-                # Restar vida y reiniciar si quedan vidas
-                lives -= 1
-                log_event(f"Vida perdida! Quedan: {lives}")
+                # Profiler: F3 overlay (y medición), F4 exportar el trace
+                if event.key == pygame.K_F3:
+                    profiler.set_enabled(not profiler.enabled)
+                    dirty_rects.invalidate_all()
+                elif event.key == pygame.K_F4:
+                    print(f"Trace: {TRACE_PATH} ({profiler.export_chrome_trace(TRACE_PATH)} eventos)")
+                # Controles de teclado (también al log de eventos, como los del mando)
+                if live_input and event.key in KEY_DIRS:
+                    log_event(KIND_KEY, event.key, 1.0)
+                    apply_input(engine, KIND_KEY, event.key, 1.0, stick_axes)
+
+        moved_axes = process_axis_events()
+        if history is not None:
+            history.note_input(hid_log.total, event_log.mark, controller)
+        kernel_memory['axis_events'] = axis_events.frame_events
+        kernel_memory['axis_processed'] = axis_events.frame_axes
+
+        # Controles con joystick izquierdo (y derecho como alternativa, axes 2/3):
+        # los ejes de los sticks que se movieron en el frame, ya procesados.
+        # Mantener el stick no repite el giro: turn() descarta la misma
+        # dirección que la última encolada.
+        if live_input and not sampled and moved_axes:
+            for axis in sorted({a for a in moved_axes if a < 4} | {a ^ 1 for a in moved_axes if a < 4}):
+                apply_input(engine, KIND_AXIS, axis, controller.axis(axis), stick_axes)
+
+        profiler.stop("events")
+
+        # Mover serpiente: simular los ticks lógicos que correspondan al tiempo real
+        profiler.start("logic")
+        frame_t0 = last_time
+        now_t = time.perf_counter()
+        elapsed_ms = (now_t - last_time) * 1000.0
+        last_time = now_t
+        n_ticks = timestep.advance(elapsed_ms)
+        for k in range(n_ticks):
+            if sampled:
+                # Aplicar, en orden, las muestras del mando anteriores al
+                # instante real que representa este tick
+                tick_t = frame_t0 + (k + 1) * (now_t - frame_t0) / n_ticks
+                for t, kind, code, value in input_sampler.drain(tick_t):
+                    if kind == KIND_AXIS:
+                        if code >= 4:
+                            continue
+                        # Procesar el stick completo (deadzone radial) con su pareja
+                        sampled_raw[code] = value
+                        for axis in (code, code ^ 1):
+                            processed = controller.process_value(
+                                axis, sampled_raw.get(axis, 0.0), sampled_raw.get(axis ^ 1, 0.0)
+                            )
+                            apply_input(engine, KIND_AXIS, axis, processed, stick_axes, t)
+                    elif kind == KIND_HAT or (kind == KIND_BUTTON and value):
+                        apply_input(engine, kind, code, value, stick_axes, t)
+            elif replay is not None:
+                # Entradas grabadas antes de simular este tick
+                for _, _, kind, code, value in replay.due(engine.ticks):
+                    apply_input(engine, kind, code, value, stick_axes)
+                if replay.ended:
+                    event_log.clear()
+                    return
+            if session_recorder is not None and engine.ticks % KEYFRAME_TICKS == 0:
+                session_recorder.keyframe(engine.ticks, keyframe_state(engine, stick_axes))
+            result = engine.tick()
+            if history is not None:
+                history.record(engine, result)
+
+            if result in (DIED, GAME_OVER):
+                # Vida perdida: la serpiente parpadea DEATH_MS sin bloquear el
+                # bucle (eventos, panel HID y dibujo siguen activos)
+                log_event(KIND_LIFE, value=engine.lives)
                 point_sound.play()
                 try:
                     if use_controller:
                         trigger_rumble(joystick, duration_ms=350, strong=1.0, weak=0.6)
                 except Exception:
                     pass
-                pygame.time.wait(600)
-                # Si no quedan vidas, game over y volver al menú
-                if lives <= 0:
-                    # Limpiar log y volver al menú
-                    event_log.clear()
-                    pygame.time.wait(300)
-                    return
-                # Si quedan vidas, reiniciar serpiente y estado
-                snake = [(5, 5), (4, 5), (3, 5)]
-                direction = (1, 0)
-                next_direction = (1, 0)
-                # Regenerar comida fuera de la serpiente
-                import random
-                while True:
-                    food = (random.randint(0, GRID_SIZE - 1), random.randint(0, GRID_SIZE - 1))
-                    if food not in snake:
-                        break
+                continue
+
+            if result == FINISHED:
+                # Sin vidas y terminada la secuencia de game over: volver al menú
+                event_log.clear()
+                return
+
+            if result == RESPAWNED:
                 # Reset draw positions and particles
-                draw_positions = [
-                    (game_origin_x + x * CELL_SIZE + 2, game_origin_y + y * CELL_SIZE + 2)
-                    for (x, y) in snake
-                ]
-                particles = []
-                # Continuar al siguiente frame sin crecer
+                draw_positions.reset(engine.snake)
+                particles.clear()
                 continue
-            
-            # Agregar cabeza
-            snake.insert(0, new_head)
-            
+
             # Comprobar si comió comida
-            if new_head == food:
-                score += 10
+            if result == ATE:
                 hit_sound.play()
                 # Vibrar control si está disponible
                 try:
@@ -1012,224 +1701,49 @@ def game_loop(mode):
                 except Exception:
                     pass
                 # Generar partículas al comer
-                import random
+                new_head = engine.head
                 cx = game_origin_x + new_head[0] * CELL_SIZE + CELL_SIZE / 2
                 cy = game_origin_y + new_head[1] * CELL_SIZE + CELL_SIZE / 2
-                for _ in range(12):
-                    particles.append({
-                        'x': cx,
-                        'y': cy,
-                        'vx': random.uniform(-2.5, 2.5),
-                        'vy': random.uniform(-2.5, 2.5),
-                        'life': random.randint(18, 36),
-                        'maxlife': 36,
-                        'clr': (255, 170, 60),
-                        'size': random.randint(2, 5)
-                    })
-                # Generar nueva comida en posición aleatoria
-                while True:
-                    food = (random.randint(0, GRID_SIZE - 1), random.randint(0, GRID_SIZE - 1))
-                    if food not in snake:
-                        break
-            else:
-                # Si no comió, quitar último segmento
-                snake.pop()
-
-        # ----------------- DIBUJAR -----------------
-        # Actualizar snapshot del kernel (estado interno) para panel
-        try:
-            kernel_memory['score'] = score
-            kernel_memory['lives'] = lives
-            kernel_memory['len_snake'] = len(snake)
-            kernel_memory['direction'] = direction
-            kernel_memory['next_direction'] = next_direction
-            kernel_memory['speed'] = speed
-            kernel_memory['frame_count'] = frame_count
-            kernel_memory['input_mute'] = input_mute_until - pygame.time.get_ticks()
-            kernel_memory['raw_count'] = len(raw_signals)
-            kernel_memory['particles'] = len(particles)
-            kernel_memory['draw_positions'] = len(draw_positions)
-            # Snapshot of axis short form
-            kernel_memory['axes'] = {k: round(v, 2) for k, v in axis_states.items()} if axis_states else {}
-            kernel_memory['buttons_pressed'] = [b for b, v in button_states.items() if v]
-        except Exception:
-            pass
-        # Fondo general
-        canvas.fill((8, 8, 14))
-
-        # Panel kernel/HID
-        draw_kernel_panel(canvas, pause_buttons)
-
-        # Área de juego: tablero tipo ajedrez con dos tonos de verde
-        light_green = (40, 160, 60)
-        dark_green = (20, 110, 35)
-        cell_margin = 0
-        for gx in range(GRID_SIZE):
-            for gy in range(GRID_SIZE):
-                col = light_green if ((gx + gy) % 2 == 0) else dark_green
-                rx = game_origin_x + gx * CELL_SIZE + cell_margin
-                ry = game_origin_y + gy * CELL_SIZE + cell_margin
-                rw = CELL_SIZE - cell_margin * 2
-                rh = CELL_SIZE - cell_margin * 2
-                pygame.draw.rect(canvas, col, (rx, ry, rw, rh))
-        # Borde del área de juego
-        pygame.draw.rect(canvas, (10, 40, 20), (game_origin_x, game_origin_y, GAME_W, GAME_H), 4, border_radius=6)
-
-        # Dibujar comida (efecto pulsante)
-        food_x, food_y = food
-        food_rect = pygame.Rect(
-            game_origin_x + food_x * CELL_SIZE + 2,
-            game_origin_y + food_y * CELL_SIZE + 2,
-            CELL_SIZE - 4, CELL_SIZE - 4
-        )
-        pulse = abs(pygame.time.get_ticks() % 600 - 300) / 300.0
-        food_color = (
-            int(255 * (0.6 + 0.4 * pulse)),
-            int(100 * (0.6 + 0.4 * pulse)),
-            int(80 * (0.6 + 0.4 * pulse))
-        )
-        pygame.draw.ellipse(canvas, food_color, food_rect)
-        pygame.draw.ellipse(canvas, (255, 150, 100), food_rect, 2)
-        center_x = food_rect.centerx
-        center_y = food_rect.centery
-        pygame.gfxdraw.filled_circle(canvas, int(center_x), int(center_y - CELL_SIZE // 8), 3, (255, 200, 150))
-
-        # Actualizar posiciones dibujadas (suavizado) y dibujar serpiente
-        smoothing = 0.32
-        # Ajustar draw_positions si la longitud cambió
-        if len(draw_positions) < len(snake):
-            if draw_positions:
-                draw_positions.insert(0, draw_positions[0])
-            else:
-                draw_positions.insert(0, (game_origin_x + snake[0][0] * CELL_SIZE + 2, game_origin_y + snake[0][1] * CELL_SIZE + 2))
-        while len(draw_positions) > len(snake):
-            draw_positions.pop()
-
-        tail_index = len(snake) - 1
-        for i, (sx, sy) in enumerate(snake):
-            target_x = game_origin_x + sx * CELL_SIZE + 2
-            target_y = game_origin_y + sy * CELL_SIZE + 2
-            cur_x, cur_y = draw_positions[i]
-            nx = cur_x + (target_x - cur_x) * smoothing
-            ny = cur_y + (target_y - cur_y) * smoothing
-            draw_positions[i] = (nx, ny)
-
-            seg_rect = pygame.Rect(int(nx), int(ny), CELL_SIZE - 4, CELL_SIZE - 4)
-            # Cabeza
-            if i == 0:
-                # Outer border (dark blue)
-                pygame.draw.rect(canvas, (6, 18, 60), seg_rect.inflate(4, 4), border_radius=8)
-                # Main head gradient (top -> bottom, light blue to deep blue)
-                head_grad = pygame.Surface((seg_rect.width, seg_rect.height))
-                top_col = (180, 220, 255)
-                bot_col = (30, 80, 200)
-                for yy in range(seg_rect.height):
-                    t = yy / max(1, seg_rect.height - 1)
-                    r = int(top_col[0] * (1 - t) + bot_col[0] * t)
-                    g = int(top_col[1] * (1 - t) + bot_col[1] * t)
-                    b = int(top_col[2] * (1 - t) + bot_col[2] * t)
-                    pygame.draw.line(head_grad, (r, g, b), (0, yy), (seg_rect.width, yy))
-                canvas.blit(head_grad, (seg_rect.x, seg_rect.y))
-                pygame.draw.rect(canvas, (220, 240, 255), seg_rect, 2, border_radius=8)
-                # Ojos (oscuro)
-                eye_x = seg_rect.x + seg_rect.width // 3
-                eye_y = seg_rect.y + seg_rect.height // 3
-                pygame.gfxdraw.filled_circle(canvas, int(eye_x), int(eye_y), 3, (8, 12, 18))
-                pygame.gfxdraw.filled_circle(canvas, int(eye_x + seg_rect.width // 3), int(eye_y), 3, (8, 12, 18))
-                # Brillo superior (sutil)
-                shine = pygame.Surface((seg_rect.width, max(2, seg_rect.height // 3)), pygame.SRCALPHA)
-                pygame.draw.ellipse(shine, (255, 255, 255, 36), (0, 0, seg_rect.width, seg_rect.height // 2))
-                canvas.blit(shine, (seg_rect.x, seg_rect.y - seg_rect.height // 6))
-            # Cola
-            elif i == tail_index:
-                tail_color = (10, 30, 120)
-                pygame.draw.rect(canvas, tail_color, seg_rect, border_radius=4)
-                pygame.draw.rect(canvas, (40, 80, 160), seg_rect, 1, border_radius=4)
-                # Small tip circle indicating tail end (darker blue)
-                try:
-                    if len(snake) >= 2:
-                        tx, ty = snake[-1]
-                        px, py = snake[-2]
-                        dx_t = tx - px
-                        dy_t = ty - py
-                        tip_x = seg_rect.centerx + dx_t * (CELL_SIZE // 4)
-                        tip_y = seg_rect.centery + dy_t * (CELL_SIZE // 4)
-                        pygame.gfxdraw.filled_circle(canvas, int(tip_x), int(tip_y), 3, (5, 10, 40))
-                except Exception:
-                    pass
-            else:
-                depth = int(180 - min(100, i * 5))
-                body_color = (30, 80, max(80, depth))
-                pygame.draw.rect(canvas, body_color, seg_rect, border_radius=4)
-                pygame.draw.rect(canvas, (90, 140, 220), seg_rect, 1, border_radius=4)
-
-        # Dibujar partículas y actualizar
-        new_particles = []
-        for p in particles:
-            p['x'] += p['vx']
-            p['y'] += p['vy']
-            p['vx'] *= 0.96
-            p['vy'] *= 0.96
-            p['life'] -= 1
-            alpha = int(255 * (p['life'] / p['maxlife']))
-            if alpha > 0:
-                surf = pygame.Surface((p['size'] * 2, p['size'] * 2), pygame.SRCALPHA)
-                pygame.gfxdraw.filled_circle(surf, p['size'], p['size'], p['size'], (*p['clr'], alpha))
-                canvas.blit(surf, (int(p['x'] - p['size']), int(p['y'] - p['size'])))
-                new_particles.append(p)
-        particles = new_particles
-
-        # Score y vidas (estilo retro verde)
-        score_text = font.render(f"SCORE: {score} | LONGITUD: {len(snake)}", True, (160, 255, 140))
-        canvas.blit(score_text, (
-            game_origin_x + GAME_W // 2 - score_text.get_width() // 2,
-            8
-        ))
+                particles.emit(cx, cy, 12)
 
-        # Dibujar vidas como corazones pixel-art en la esquina superior izquierda del área de juego
-        heart_base_x = game_origin_x + 8
-        heart_base_y = 8
-        heart_gap = 6
-        # Corazones en rojo
-        heart_color = (220, 20, 60)
-        dark_color = (110, 20, 30)
-        for i in range(lives):
-            hx = heart_base_x + i * (CELL_SIZE // 2 + heart_gap)
-            hy = heart_base_y
-            # Dibujar corazón simple: dos círculos y un triángulo/rect
-            # círculos
-            pygame.gfxdraw.filled_circle(canvas, hx + 3, hy + 3, 3, heart_color)
-            pygame.gfxdraw.filled_circle(canvas, hx + 8, hy + 3, 3, heart_color)
-            # parte inferior
-            pts = [(hx + 1, hy + 5), (hx + 10, hy + 5), (hx + 5, hy + 11)]
-            pygame.draw.polygon(canvas, heart_color, pts)
-            pygame.draw.polygon(canvas, dark_color, pts, 1)
-
-        # Footer para DualSense
-        footer_rect = pygame.Rect(0, GAME_H, SCREEN_W, FOOTER_H)
-        pygame.draw.rect(canvas, (8, 8, 12), footer_rect)
-        pygame.draw.line(canvas, (40, 40, 60), (0, GAME_H), (SCREEN_W, GAME_H), 2)
-
-        # DualSense centrado en el footer
-        ctrl_cx = SCREEN_W // 2
-        ctrl_cy = GAME_H + FOOTER_H // 2 + 5
-        draw_dualsense(
-            canvas, ctrl_cx, ctrl_cy,
-            max_w=SCREEN_W - 200,    # reduce ancho útil del SVG
-            max_h=(FOOTER_H - 60),   # reduce altura útil del SVG
-            axes=axis_states,
-            btns=button_states
-        )
+        profiler.stop("logic")
 
-        present_frame()
-        clock.tick(60)
+        # ----------------- DIBUJAR -----------------
+        update_kernel_memory(engine, particles, draw_positions)
+        draw_game_frame(canvas, engine, draw_positions, particles, elapsed_ms, pause_buttons, dirty_rects)
+        if profiler.enabled:
+            dirty_rects.add(draw_profiler_overlay(canvas))
+
+        # Sólo se presentan las zonas que cambiaron (frame completo si hace falta)
+        profiler.start("present_frame")
+        present_frame(dirty_rects.collect())
+        profiler.stop("present_frame")
+        profiler.start("wait")
+        clock.tick(RENDER_FPS)
+        profiler.stop("wait")
+        profiler.end_frame()
 
 # -----------------  MAIN -----------------
 if __name__ == "__main__":
+    if REPLAY_PATH:
+        # Reproducir una grabación (--replay) y salir
+        game_loop(0, REPLAY_PATH)
+        quit_pygame()
+        sys.exit()
     while True:
         opt = menu_loop()   # 0 = Jugar, 1 = Salir
         if opt == 0:
             game_loop(0)
         else:
-            pygame.quit()
+            print(static_layers.stats())
+            print(text_cache.stats())
+            print(axis_events.stats())
+            print(timestep.stats())
+            if input_sampler is not None:
+                print(input_sampler.stats())
+            if profiler.frames:
+                for name, (p50, p95, p99) in profiler.percentiles().items():
+                    print(f"{name:<24} p50 {p50:6.2f}  p95 {p95:6.2f}  p99 {p99:6.2f} ms")
+                print(f"Trace: {TRACE_PATH} ({profiler.export_chrome_trace(TRACE_PATH)} eventos)")
+            quit_pygame()
             sys.exit()
@@ -0,0 +1,132 @@
+"""
+Profiler de etapas del frame con time.perf_counter_ns().
+
+Cada etapa se mide con start(nombre) / stop(nombre); end_frame() cierra el
+frame y guarda el total de cada etapa en una ventana de los últimos
+`window` frames, de la que salen los percentiles p50 / p95 / p99. Cada
+intervalo también queda en un buffer circular para exportarlo como JSON
+de Chrome trace-event (abrir en https://ui.perfetto.dev o chrome://tracing).
+
+Desactivado, start() / stop() / end_frame() sólo comprueban un flag.
+"""
+import json
+import time
+
+import numpy as np
+
+from hid_input import RingBuffer
+
+# Intervalo del trace: etapa, inicio y duración en ns
+SPAN_DTYPE = np.dtype([
+    ("stage", "i2"),
+    ("start", "i8"),
+    ("dur", "i8"),
+])
+
+FRAME = "frame"
+
+
+class FrameProfiler:
+    """Tiempos por etapa y por frame.
+
+    - enabled: si está desactivado no se mide nada
+    - start(stage) / stop(stage): intervalo de una etapa (se acumula si se repite en el frame)
+    - end_frame(): cierra el frame (también mide el frame completo, etapa "frame")
+    - restart_frame(): descarta el frame en curso (tras una pausa)
+    - percentiles(): {etapa: (p50, p95, p99)} en ms sobre la ventana
+    - export_chrome_trace(path): escribe los intervalos guardados
+    """
+
+    def __init__(self, stages, window=240, trace_capacity=1 << 17, enabled=False):
+        self.stages = (FRAME,) + tuple(stages)
+        self.index = {name: i for i, name in enumerate(self.stages)}
+        self.window = window
+        self.enabled = enabled
+        self.samples = np.zeros((len(self.stages), window), np.int64)   # ns por frame
+        self.frames = 0
+        self.spans = RingBuffer(trace_capacity, SPAN_DTYPE)
+        self._open = [0] * len(self.stages)
+        self._frame = [0] * len(self.stages)
+        self._frame_start = None
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        # El primer frame tras activar (incompleto) no se cuenta; las etapas
+        # ya abiertas miden desde ahora
+        self._frame_start = None
+        self._frame = [0] * len(self.stages)
+        self._open = [time.perf_counter_ns()] * len(self.stages)
+
+    # ----------------- MEDICIÓN -----------------
+    def start(self, stage):
+        if self.enabled:
+            self._open[self.index[stage]] = time.perf_counter_ns()
+
+    def stop(self, stage):
+        if self.enabled:
+            now = time.perf_counter_ns()
+            i = self.index[stage]
+            start = self._open[i]
+            self._frame[i] += now - start
+            self.spans.append(i, start, now - start)
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter_ns()
+        if self._frame_start is not None:
+            self._frame[0] = now - self._frame_start
+            self.spans.append(0, self._frame_start, now - self._frame_start)
+            self.samples[:, self.frames % self.window] = self._frame
+            self.frames += 1
+        self._frame_start = now
+        self._frame = [0] * len(self.stages)
+
+    def restart_frame(self):
+        """Descarta lo medido en el frame en curso (p. ej. tras una pausa);
+        las etapas abiertas siguen midiendo desde ahora."""
+        if not self.enabled:
+            return
+        now = time.perf_counter_ns()
+        self._frame_start = now
+        self._frame = [0] * len(self.stages)
+        self._open = [now] * len(self.stages)
+
+    def clear(self):
+        self.samples[:] = 0
+        self.frames = 0
+        self.spans.clear()
+        self._frame_start = None
+
+    # ----------------- RESULTADOS -----------------
+    def percentiles(self):
+        """{etapa: (p50, p95, p99)} en ms de los últimos frames (vacío si no hay)."""
+        n = min(self.frames, self.window)
+        if n == 0:
+            return {}
+        p = np.percentile(self.samples[:, :n], (50, 95, 99), axis=1) / 1e6
+        return {name: tuple(p[:, i].tolist()) for i, name in enumerate(self.stages)}
+
+    def trace_events(self):
+        """Intervalos guardados como eventos "X" (complete) de Chrome trace-event."""
+        spans = self.spans.last(self.spans.capacity)
+        events = [
+            {"name": "thread_name", "ph": "M", "pid": 1, "tid": 1, "args": {"name": "game_loop"}},
+        ]
+        if len(spans) == 0:
+            return events
+        t0 = int(spans["start"].min())
+        stages = self.stages
+        for stage, start, dur in zip(spans["stage"].tolist(), spans["start"].tolist(), spans["dur"].tolist()):
+            events.append({
+                "name": stages[stage], "ph": "X", "pid": 1, "tid": 1,
+                "ts": (start - t0) / 1000.0, "dur": dur / 1000.0,
+            })
+        return events
+
+    def export_chrome_trace(self, path):
+        """Escribe el JSON de trace (se abre en Perfetto); devuelve el número de eventos."""
+        events = self.trace_events()
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return len(events)
@@ -0,0 +1,261 @@
+"""
+Cachés de dibujo para pygame.
+
+Superficies que no cambian entre frames se dibujan una vez y se reutilizan
+con un único blit.
+"""
+import os
+from collections import OrderedDict
+
+import pygame
+
+
+def to_display_format(surface, alpha=False):
+    """Convierte surface al formato de la pantalla (blits más rápidos) si hay ventana."""
+    if pygame.display.get_surface() is None:
+        return surface
+    return surface.convert_alpha() if alpha else surface.convert()
+
+
+class LayerCache:
+    """Capas estáticas pre-renderizadas.
+
+    Cada capa se identifica por nombre y se dibuja con builder(surface). Sólo
+    se vuelve a dibujar si cambia su clave (p. ej. tamaño o GRID_SIZE) o si se
+    invalida (al redimensionar la ventana cambia el formato de pantalla).
+    """
+
+    def __init__(self):
+        self._layers = {}   # nombre -> (clave, superficie)
+        self.builds = 0
+
+    def get(self, name, size, key, builder, alpha=False):
+        entry = self._layers.get(name)
+        if entry is not None and entry[0] == key:
+            return entry[1]
+        surface = pygame.Surface(size, pygame.SRCALPHA if alpha else 0)
+        builder(surface)
+        surface = to_display_format(surface, alpha)
+        self._layers[name] = (key, surface)
+        self.builds += 1
+        return surface
+
+    def invalidate(self, name=None):
+        """Descarta una capa (o todas si name es None)."""
+        if name is None:
+            self._layers.clear()
+        else:
+            self._layers.pop(name, None)
+
+    def stats(self):
+        names = ", ".join(sorted(self._layers)) or "-"
+        return f"LayerCache: {self.builds} construcciones, {len(self._layers)} capas ({names})"
+
+
+class DirtyRects:
+    """Rectángulos del canvas que cambiaron en el frame.
+
+    Se añade lo que se dibuja cada frame; collect() devuelve esos rects más
+    los del frame anterior (donde hay que borrar lo que ya no está). Si hay
+    demasiados se fusionan en uno. collect() devuelve None cuando toca un
+    frame completo (primer frame, tras redimensionar o tras un menú).
+    """
+
+    def __init__(self, max_rects=96):
+        self.max_rects = max_rects
+        self.rects = []
+        self.prev = []
+        self.full = True
+
+    def add(self, rect):
+        if rect:
+            self.rects.append(pygame.Rect(rect))
+        return rect
+
+    def invalidate_all(self):
+        """Fuerza un frame completo en el próximo collect()."""
+        self.full = True
+
+    def collect(self):
+        rects = self.rects + self.prev
+        self.prev = self.rects
+        self.rects = []
+        if self.full:
+            self.full = False
+            return None
+        if len(rects) > self.max_rects:
+            return [rects[0].unionall(rects[1:])]
+        return rects
+
+
+class GpuPresenter:
+    """Presenta un canvas con SDL2 Renderer/Texture (pygame._sdl2.video).
+
+    Usa su propia ventana (en lugar de pygame.display.set_mode). El canvas
+    se sube a una textura (sólo las zonas sucias si se indican) y el renderer
+    la escala con letterbox (logical_size) y vsync. create() devuelve None si
+    el backend no está disponible, para volver al camino por software.
+    """
+
+    def __init__(self, window, renderer, texture):
+        self.window = window
+        self.renderer = renderer
+        self.texture = texture
+
+    @classmethod
+    def create(cls, size, title="", vsync=True):
+        try:
+            from pygame._sdl2.video import Window, Renderer, Texture
+        except ImportError:
+            return None
+        try:
+            # Escalado lineal (equivalente a smoothscale); SDL lee el hint del entorno
+            os.environ.setdefault("SDL_RENDER_SCALE_QUALITY", "1")
+            window = Window(title, size, resizable=True)
+            renderer = Renderer(window, accelerated=-1, vsync=vsync)
+            renderer.logical_size = size
+            texture = Texture(renderer, size, streaming=True)
+        except Exception:
+            return None
+        return cls(window, renderer, texture)
+
+    def present(self, surface, dirty=None):
+        """Sube surface (o sólo los rects de dirty) y presenta."""
+        if dirty is None:
+            self.texture.update(surface)
+        else:
+            bounds = surface.get_rect()
+            for rect in dirty:
+                area = pygame.Rect(rect).clip(bounds)
+                if area:
+                    self.texture.update(surface.subsurface(area), area)
+        self.renderer.draw_color = (0, 0, 0, 255)
+        self.renderer.clear()
+        self.texture.draw()
+        self.renderer.present()
+
+
+class TextCache:
+    """Caché LRU de textos renderizados, clave (font, text, color, antialias).
+
+    Limitada por memoria (bytes de píxeles de las superficies guardadas);
+    cuenta aciertos y fallos para medir su efectividad.
+    """
+
+    def __init__(self, max_bytes=4 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()   # clave -> superficie
+
+    def render(self, font, text, color, antialias=True):
+        """Como font.render(text, antialias, color), pero reutilizando el resultado."""
+        key = (font, text, tuple(color), antialias)
+        surface = self._entries.get(key)
+        if surface is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self._entries[key] = surface
+        self.bytes += _surface_bytes(surface)
+        while self.bytes > self.max_bytes and len(self._entries) > 1:
+            _, old = self._entries.popitem(last=False)
+            self.bytes -= _surface_bytes(old)
+        return surface
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return (f"TextCache: {self.hit_rate:.1%} aciertos ({self.hits}/{self.hits + self.misses}), "
+                f"{len(self._entries)} textos, {self.bytes / 1024:.0f} KiB")
+
+
+def _surface_bytes(surface):
+    return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+
+# Tablas de 256 entradas para volcados de bytes
+HEX_TABLE = tuple(f"{b:02X}" for b in range(256))
+BIN_TABLE = tuple(f"{b:08b}" for b in range(256))
+
+
+class GlyphAtlas:
+    """Texto ASCII dibujado con blits desde un atlas pre-rasterizado.
+
+    Pensado para fuentes de ancho fijo y volcados densos (hex / binario):
+    los glifos ASCII y las 256 cadenas hex y binarias de un byte se
+    rasterizan una vez; una línea cuesta un único surface.blits() de
+    sub-rects del atlas en lugar de un font.render().
+    """
+
+    CHARS = "".join(chr(c) for c in range(32, 127))
+
+    def __init__(self, font, color, antialias=True):
+        self.height = font.get_height()
+        # Fila 0: glifos ASCII; filas 1 y 2: HEX_TABLE y BIN_TABLE
+        rows = [
+            [font.render(ch, antialias, color) for ch in self.CHARS],
+            [font.render(text, antialias, color) for text in HEX_TABLE],
+            [font.render(text, antialias, color) for text in BIN_TABLE],
+        ]
+        width = max(sum(g.get_width() for g in row) for row in rows)
+        atlas = pygame.Surface((max(1, width), self.height * len(rows)), pygame.SRCALPHA)
+        rects = []
+        for row_idx, row in enumerate(rows):
+            x = 0
+            y = row_idx * self.height
+            row_rects = []
+            for glyph in row:
+                atlas.blit(glyph, (x, y))
+                row_rects.append(pygame.Rect(x, y, glyph.get_width(), glyph.get_height()))
+                x += glyph.get_width()
+            rects.append(row_rects)
+        self.atlas = to_display_format(atlas, alpha=True)
+
+        metrics = font.metrics(self.CHARS)
+        self.rects = {}      # código ASCII -> rect en el atlas
+        self.advance = {}    # código ASCII -> avance horizontal
+        for ch, rect, m in zip(self.CHARS, rects[0], metrics):
+            self.rects[ord(ch)] = rect
+            self.advance[ord(ch)] = m[4] if m else rect.width
+        self.hex_rects = rects[1]   # byte -> rect de su texto hex
+        self.bin_rects = rects[2]   # byte -> rect de su texto binario
+        self.space = self.advance[ord(" ")]
+
+    def draw(self, surface, text, pos):
+        """Dibuja text (ASCII; otros caracteres se omiten) y devuelve su rect."""
+        x, y = pos
+        atlas = self.atlas
+        seq = []
+        for ch in text:
+            code = ord(ch)
+            rect = self.rects.get(code)
+            if rect is not None:
+                seq.append((atlas, (x, y), rect))
+                x += self.advance[code]
+        surface.blits(seq, False)
+        return pygame.Rect(pos[0], y, x - pos[0], self.height)
+
+    def draw_bytes(self, surface, data, pos, binary=False):
+        """Volcado de data en hex (o binario) separado por espacios; devuelve su rect."""
+        table = self.bin_rects if binary else self.hex_rects
+        x, y = pos
+        atlas = self.atlas
+        space = self.space
+        seq = []
+        for b in data:
+            rect = table[b]
+            seq.append((atlas, (x, y), rect))
+            x += rect.width + space
+        surface.blits(seq, False)
+        return pygame.Rect(pos[0], y, max(0, x - space - pos[0]), self.height)
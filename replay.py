@@ -0,0 +1,290 @@
+"""
+Grabación y reproducción de sesiones de Snake.
+
+Formato binario (little endian):
+
+    cabecera  "SNKR" | versión u16 | semilla u64 | grid_w u16 | grid_h u16
+    registro  varint Δtick | varint Δt (µs) | kind u8 | code i32 | value f32
+
+tick es el tick lógico del motor en el que se aplicó la entrada (antes de
+simular ese tick) y t el tiempo monotónico desde el inicio de la sesión.
+Los dos se guardan como diferencia con el registro anterior en varint
+(LEB128), así que un registro típico ocupa 11 bytes. La escritura se hace
+por lotes; la lectura usa mmap, de modo que abrir una grabación larga no
+la carga en memoria.
+
+Al cerrar la grabación se añade un registro KIND_END con el tick final de
+la partida: la reproducción termina al llegar a él.
+
+Keyframes (versión 2): cada cierto número de ticks se guarda un registro
+KIND_KEYFRAME (code = tamaño) seguido del estado completo de la partida.
+Al cerrar se escribe un índice de keyframes y un pie:
+
+    índice    tick u64 | t u64 | posición u64 | tamaño u32   (por keyframe)
+    pie       posición del índice u64 | tick final u64 | keyframes u32 | "SKIX"
+
+Para saltar a un tick se restaura el último keyframe anterior y se simula
+desde él. Si falta el pie (grabación interrumpida) el índice se reconstruye
+recorriendo el fichero hasta el último registro completo.
+"""
+import bisect
+import mmap
+import os
+import struct
+import time
+
+MAGIC = b"SNKR"
+VERSION = 2
+HEADER = struct.Struct("<4sHQHH")
+RECORD = struct.Struct("<Bif")     # kind, code, value
+KIND_END = 0x00                    # fin de la sesión (no es una entrada)
+KIND_KEYFRAME = 0x01               # estado completo; code = tamaño en bytes
+INDEX_ENTRY = struct.Struct("<QQQI")
+FOOTER = struct.Struct("<QQI4s")
+FOOTER_MAGIC = b"SKIX"
+
+
+def encode_varint(n, out):
+    """Añade n (entero >= 0) a out (bytearray) en LEB128."""
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def decode_varint(buf, pos, end=None):
+    """Lee un varint de buf en pos; devuelve (valor, nueva posición).
+
+    Si el varint no termina antes de end (fichero cortado) devuelve (None, end).
+    """
+    if end is None:
+        end = len(buf)
+    result = 0
+    shift = 0
+    while pos < end:
+        b = buf[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        if b < 0x80:
+            return result, pos
+        shift += 7
+    return None, end
+
+
+class SessionRecorder:
+    """Escribe los registros de entrada de una sesión en path.
+
+    record(tick, kind, code, value) acumula en un buffer en memoria y sólo
+    escribe al superar flush_bytes (y al cerrar).
+    """
+
+    def __init__(self, path, seed, grid_w, grid_h, flush_bytes=64 * 1024):
+        self.path = path
+        self.seed = seed
+        self.flush_bytes = flush_bytes
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, seed, grid_w, grid_h))
+        self.buffer = bytearray()
+        self.records = 0
+        self.t0 = time.perf_counter()
+        self.last_tick = 0
+        self.last_us = 0
+        self.written = HEADER.size        # bytes ya escritos en el fichero
+        self.index = bytearray()          # entradas INDEX_ENTRY de los keyframes
+        self.keyframes = 0
+
+    def record(self, tick, kind, code, value, t=None):
+        """Añade un registro; t es un instante de time.perf_counter() (ahora si es None)."""
+        t_us = int(((time.perf_counter() if t is None else t) - self.t0) * 1e6)
+        # Las marcas de tiempo del hilo de muestreo pueden llegar algo desordenadas
+        t_us = max(t_us, self.last_us)
+        buf = self.buffer
+        encode_varint(tick - self.last_tick, buf)
+        encode_varint(t_us - self.last_us, buf)
+        buf += RECORD.pack(kind, code, value)
+        self.last_tick = tick
+        self.last_us = t_us
+        self.records += 1
+        if len(buf) >= self.flush_bytes:
+            self.flush()
+
+    def keyframe(self, tick, state):
+        """Añade un keyframe: state (bytes) es el estado tras las entradas de tick."""
+        self.record(tick, KIND_KEYFRAME, len(state), 0.0)
+        self.records -= 1     # records cuenta sólo entradas
+        offset = self.written + len(self.buffer)
+        self.index += INDEX_ENTRY.pack(tick, self.last_us, offset, len(state))
+        self.keyframes += 1
+        self.buffer += state
+        if len(self.buffer) >= self.flush_bytes:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.file.write(self.buffer)
+            self.written += len(self.buffer)
+            self.buffer.clear()
+
+    def close(self, end_tick=None):
+        """Cierra el fichero; con end_tick añade antes el registro KIND_END.
+
+        Escribe también el índice de keyframes y el pie.
+        """
+        if not self.file.closed:
+            if end_tick is not None:
+                self.record(max(end_tick, self.last_tick), KIND_END, 0, 0.0)
+            self.flush()
+            self.file.write(self.index)
+            self.file.write(FOOTER.pack(self.written, self.last_tick, self.keyframes, FOOTER_MAGIC))
+            self.file.close()
+
+
+class SessionReader:
+    """Lee una grabación con mmap; se itera como (tick, t_us, kind, code, value).
+
+    Los keyframes no aparecen en la iteración: están en keyframe_ticks y
+    se leen con keyframe(i).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            # Vacío o sin cabecera completa (grabación cortada nada más empezar);
+            # mmap de un fichero vacío fallaría con otro error
+            if os.fstat(f.fileno()).st_size < HEADER.size:
+                raise ValueError(f"{path}: no es una grabación de Snake")
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.seed, self.grid_w, self.grid_h = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: no es una grabación de Snake")
+        if version not in (1, VERSION):
+            raise ValueError(f"{path}: versión {version} no soportada")
+        self.data_start = HEADER.size
+        self.data_end = len(self.map)
+        self.end_tick = None
+        # Keyframes: tick, (t_us, posición, tamaño) en listas paralelas
+        self.keyframe_ticks = []
+        self._keyframes = []
+        if version >= 2:
+            self._read_index()
+
+    def _read_index(self):
+        buf = self.map
+        if len(buf) >= self.data_start + FOOTER.size:
+            index_pos, end_tick, count, magic = FOOTER.unpack_from(buf, len(buf) - FOOTER.size)
+            if magic == FOOTER_MAGIC:
+                self.data_end = index_pos
+                self.end_tick = end_tick
+                for i in range(count):
+                    tick, t_us, pos, size = INDEX_ENTRY.unpack_from(buf, index_pos + i * INDEX_ENTRY.size)
+                    self.keyframe_ticks.append(tick)
+                    self._keyframes.append((t_us, pos, size))
+                return
+        # Sin pie: reconstruir el índice recorriendo los registros
+        for tick, t_us, kind, code, value, pos in self._scan(self.data_start, 0, 0, keyframes=True):
+            if kind == KIND_KEYFRAME:
+                self.keyframe_ticks.append(tick)
+                self._keyframes.append((t_us, pos, code))
+            elif kind == KIND_END:
+                self.end_tick = tick
+
+    def _scan(self, pos, tick, t_us, keyframes=False):
+        """Registros desde pos con tick / t_us de partida; con keyframes=True
+        también devuelve los KIND_KEYFRAME, y cada tupla lleva la posición
+        siguiente al registro."""
+        buf = self.map
+        end = self.data_end
+        unpack = RECORD.unpack_from
+        size = RECORD.size
+        while pos < end:
+            d_tick, pos = decode_varint(buf, pos, end)
+            d_us, pos = decode_varint(buf, pos, end)
+            if d_us is None or pos + size > end:
+                return     # registro incompleto (grabación interrumpida)
+            tick += d_tick
+            t_us += d_us
+            kind, code, value = unpack(buf, pos)
+            pos += size
+            if kind == KIND_KEYFRAME:
+                if pos + code > end:
+                    return     # keyframe incompleto (grabación interrumpida)
+                if keyframes:
+                    yield tick, t_us, kind, code, value, pos
+                pos += code
+                continue
+            if keyframes:
+                yield tick, t_us, kind, code, value, pos
+            else:
+                yield tick, t_us, kind, code, value
+            if kind == KIND_END:
+                return     # detrás sólo puede venir el índice (sin pie si se cortó)
+
+    def __iter__(self):
+        return self._scan(self.data_start, 0, 0)
+
+    def keyframe(self, i):
+        """Estado (bytes) del keyframe i."""
+        _, pos, size = self._keyframes[i]
+        return self.map[pos:pos + size]
+
+    def records_after_keyframe(self, i):
+        """Iterador de los registros posteriores al keyframe i."""
+        t_us, pos, size = self._keyframes[i]
+        return self._scan(pos + size, self.keyframe_ticks[i], t_us)
+
+    def close(self):
+        self.map.close()
+
+
+class ReplayFeed:
+    """Entrega los registros de una grabación tick a tick.
+
+    due(tick) devuelve los registros que se aplicaron antes de simular ese
+    tick (en el orden en que se grabaron). ended pasa a True al llegar al
+    registro KIND_END, y done cuando ya no quedan registros.
+
+    seek(tick) reposiciona la lectura en el último keyframe anterior a tick
+    y devuelve su estado: quien lo use lo restaura y simula hasta tick.
+    """
+
+    def __init__(self, reader):
+        self.reader = reader
+        self.ended = False
+        self.end_tick = reader.end_tick
+        self._start(iter(reader))
+
+    def _start(self, records):
+        self._records = records
+        self._next = next(self._records, None)
+
+    def keyframe_index(self, tick):
+        """Índice del último keyframe con tick <= tick (-1 si no hay)."""
+        return bisect.bisect_right(self.reader.keyframe_ticks, tick) - 1
+
+    def seek(self, tick):
+        """Vuelve al último keyframe anterior a tick; devuelve su estado
+        (o None si no hay: la lectura vuelve al principio)."""
+        self.ended = False
+        i = self.keyframe_index(tick)
+        if i < 0:
+            self._start(iter(self.reader))
+            return None
+        self._start(self.reader.records_after_keyframe(i))
+        return self.reader.keyframe(i)
+
+    @property
+    def done(self):
+        return self._next is None
+
+    def due(self, tick):
+        out = []
+        while self._next is not None and self._next[0] <= tick:
+            record = self._next
+            self._next = next(self._records, None)
+            if record[2] == KIND_END:
+                self.ended = True
+                self.end_tick = record[0]
+                self._next = None
+                break
+            out.append(record)
+        return out
@@ -0,0 +1,116 @@
+"""
+Reproduce una grabación (replay.py) a máxima velocidad, sin ventana.
+
+Las entradas grabadas se aplican con apply_input() de pong_dualsense, igual
+que en el juego, y el motor avanza tick a tick sin límite de frames. Al
+terminar imprime la puntuación final, el hash combinado de los estados de
+todos los ticks y la velocidad simulada frente al tiempo real. Dos
+ejecuciones de la misma grabación dan la misma secuencia de hashes, así que
+cada grabación sirve como test de regresión.
+
+Uso:
+    python replay_runner.py partida.snkr
+    python replay_runner.py partida.snkr --hashes hashes.txt   # un hash por tick ("-": consola)
+    python replay_runner.py partida.snkr --render --render-every 4
+    python replay_runner.py partida.snkr --seek 120000   # empezar en un tick (desde su keyframe)
+"""
+import argparse
+import os
+import sys
+import time
+import zlib
+
+# Sin ventana ni audio reales (antes de importar pygame)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pong_dualsense as game
+from render_cache import DirtyRects
+from particles import ParticlePool
+from replay import SessionReader, ReplayFeed
+from snake_engine import SnakeEngine, FINISHED, LOGIC_STEP_MS
+
+
+def run_replay(path, hashes_out=None, render=False, render_every=1, max_ticks=None, seek=None):
+    """Simula la grabación de path; devuelve (engine, hash combinado, segundos reales).
+
+    hashes_out: fichero de texto donde escribir "tick hash" por cada tick.
+    render: dibuja un frame cada render_every ticks (sin presentar a ritmo real).
+    seek: empieza en ese tick, restaurando el keyframe anterior (los hashes
+    empiezan en el tick siguiente).
+    """
+    reader = SessionReader(path)
+    feed = ReplayFeed(reader)
+    engine = SnakeEngine(grid_w=reader.grid_w, grid_h=reader.grid_h, seed=reader.seed)
+    stick_axes = {}
+    digest = 0
+    apply_input = game.apply_input
+    state_hash = engine.state_hash
+    tick = engine.tick
+
+    if render:
+        game.event_log.clear()
+        game.controller.reset()
+        dirty_rects = DirtyRects()
+        particles = ParticlePool()
+        draw_positions = game.SegmentPositions(game.GAME_ORIGIN_X, game.GAME_ORIGIN_Y, engine.snake)
+        frame_ms = LOGIC_STEP_MS * render_every
+
+    t0 = time.perf_counter()
+    if seek:
+        game.seek_replay(engine, feed, stick_axes, seek)
+    try:
+        while max_ticks is None or engine.ticks < max_ticks:
+            for _, _, kind, code, value in feed.due(engine.ticks):
+                apply_input(engine, kind, code, value, stick_axes)
+            # Fin de la grabación (sin registro de fin: tras la última entrada)
+            if feed.ended or feed.done:
+                break
+            result = tick()
+            h = state_hash()
+            # Hash combinado: CRC32 de la secuencia de hashes
+            digest = zlib.crc32(h.to_bytes(4, "little"), digest)
+            if hashes_out is not None:
+                hashes_out.write(f"{engine.ticks} {h:08x}\n")
+            if render and engine.ticks % render_every == 0:
+                game.update_kernel_memory(engine, particles, draw_positions)
+                game.draw_game_frame(game.canvas, engine, draw_positions, particles, frame_ms, [], dirty_rects)
+                game.present_frame(dirty_rects.collect())
+            if result == FINISHED:
+                break
+    finally:
+        reader.close()
+    return engine, digest, time.perf_counter() - t0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reproduce una grabación de Snake sin límite de frames.")
+    parser.add_argument("path", help="grabación creada con --record")
+    parser.add_argument("--hashes", metavar="ARCHIVO", help='escribe "tick hash" por tick ("-" para la consola)')
+    parser.add_argument("--render", action="store_true", help="dibuja los frames (con el driver de vídeo actual)")
+    parser.add_argument("--render-every", type=int, default=1, metavar="N", help="dibujar un frame cada N ticks")
+    parser.add_argument("--max-ticks", type=int, metavar="N", help="detener tras N ticks")
+    parser.add_argument("--seek", type=int, metavar="TICK", help="empezar en TICK (desde el keyframe anterior)")
+    args = parser.parse_args(argv)
+
+    hashes_out = None
+    if args.hashes == "-":
+        hashes_out = sys.stdout
+    elif args.hashes:
+        hashes_out = open(args.hashes, "w")
+    try:
+        engine, digest, wall_s = run_replay(
+            args.path, hashes_out, args.render, max(1, args.render_every), args.max_ticks, args.seek
+        )
+    finally:
+        if hashes_out not in (None, sys.stdout):
+            hashes_out.close()
+
+    sim_s = engine.sim_ms / 1000.0
+    print(f"Puntuación final: {engine.score} (vidas {engine.lives}, longitud {len(engine)})")
+    print(f"Ticks: {engine.ticks}  hash: {digest:08x}  último estado: {engine.state_hash():08x}")
+    print(f"Simulado {sim_s:.2f} s en {wall_s:.3f} s reales ({sim_s / max(wall_s, 1e-9):,.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,432 @@
+"""
+Motor de reglas del Snake, independiente de pygame.
+
+Contiene sólo el estado del juego (serpiente, comida, vidas, puntuación y
+velocidad) y las reglas de movimiento. No importa nada de pygame, así que se
+puede ejecutar, probar y medir sin ventana.
+"""
+import random
+import struct
+import zlib
+from array import array
+from collections import deque
+from itertools import chain
+
+# ----------------- CONSTANTES -----------------
+GRID_SIZE = 10
+INITIAL_LIVES = 3
+
+# Velocidad en celdas por segundo (L1/R1 la ajustan de SPEED_STEP en SPEED_STEP)
+INITIAL_SPEED = 6.0
+MIN_SPEED = 2.0
+MAX_SPEED = 30.0
+SPEED_STEP = 1.0
+
+# Paso fijo de la simulación: la lógica avanza en ticks de LOGIC_STEP_MS
+# milisegundos simulados, independientes de los FPS de dibujo.
+LOGIC_STEP_MS = 5.0          # 200 ticks por segundo
+MAX_CATCHUP_TICKS = 40       # ticks máximos por frame (200 ms simulados)
+MAX_BACKLOG_MS = 250.0       # retraso máximo acumulado antes de descartar tiempo
+
+# Direcciones (dx, dy)
+UP = (0, -1)
+DOWN = (0, 1)
+LEFT = (-1, 0)
+RIGHT = (1, 0)
+
+# Resultados de SnakeEngine.step() / tick()
+MOVED = 0
+ATE = 1
+DIED = 2
+GAME_OVER = 3
+RESPAWNED = 4   # fin de la animación de muerte, serpiente nueva
+FINISHED = 5    # fin de la secuencia de game over
+
+# Duración (ms simulados) de la animación de muerte y de game over
+DEATH_MS = 600
+GAME_OVER_MS = 300
+
+FOOD_SCORE = 10
+
+# Giros pendientes como máximo (uno se consume en cada movimiento)
+MAX_QUEUED_TURNS = 3
+
+# Escalares de SnakeEngine.state_hash(): lives, score, dirección, flags,
+# speed, move_progress, death_ms
+STATE_SCALARS = struct.Struct("<iqbbBddd")
+
+# Cabecera de SnakeEngine.snapshot(): ticks, steps, escalares de
+# STATE_SCALARS y longitudes de serpiente, giros, comida y celdas libres
+SNAPSHOT_HEADER = struct.Struct("<qq" + STATE_SCALARS.format[1:] + "IBII")
+
+# Contenido de cada celda en SnakeEngine.occupied
+EMPTY = 0
+BODY = 1
+FOOD = 2
+
+
+class SnakeEngine:
+    """Estado y reglas de una partida de Snake.
+
+    - reset(seed): reinicia la partida (semilla opcional para el RNG)
+    - step(action): avanza un movimiento; action es una dirección o None
+    """
+
+    def __init__(self, grid_w=GRID_SIZE, grid_h=None, lives=INITIAL_LIVES, seed=None, food_count=1):
+        self.grid_w = grid_w
+        self.grid_h = grid_w if grid_h is None else grid_h
+        self.initial_lives = lives
+        self.food_count = food_count
+        self.rng = random.Random()
+        # Rejilla de ocupación (EMPTY / BODY / FOOD), índice y * grid_w + x
+        self.occupied = bytearray(self.grid_w * self.grid_h)
+        # Índice de celdas libres: free_cells es una lista desordenada y
+        # free_pos[cell] su posición en ella (-1 si la celda está ocupada).
+        # Altas y bajas son O(1) intercambiando con el último elemento.
+        # reset() los rehace en orden canónico.
+        self.free_cells = []
+        self.free_pos = []
+        self.snake = deque()
+        self.foods = []
+        # Giros pendientes, validados contra el último encolado
+        self.turn_queue = deque()
+        self.reset(seed)
+
+    # ----------------- ESTADO -----------------
+    def reset(self, seed=None):
+        """Reinicia vidas, puntuación, velocidad, serpiente y comida."""
+        self.seed = seed
+        self.rng.seed(seed)
+        self.lives = self.initial_lives
+        self.score = 0
+        self.speed = INITIAL_SPEED
+        self.game_over = False
+        # dead: la serpiente murió y espera reaparecer (animación de muerte)
+        self.dead = False
+        # finished: terminó también la secuencia de game over
+        self.finished = False
+        # ms simulados desde la última muerte (para animar)
+        self.death_ms = 0.0
+        self.steps = 0
+        self.ticks = 0
+        # Fracción de celda recorrida hacia el próximo movimiento (0..1)
+        self.move_progress = 0.0
+        # Tablero vacío y celdas libres en orden canónico: el orden de
+        # free_cells decide dónde cae la comida, así que reset(seed) no debe
+        # heredarlo de la partida anterior (misma partida que SnakeEngine(seed=seed))
+        n = self.grid_w * self.grid_h
+        self.occupied[:] = bytes(n)
+        self.free_cells = list(range(n))
+        self.free_pos = list(range(n))
+        self.snake.clear()
+        self.foods = []
+        self._spawn_snake()
+
+    def respawn(self):
+        """Termina la muerte: serpiente nueva y comida nueva."""
+        self.dead = False
+        self._spawn_snake()
+
+    def _spawn_snake(self):
+        """Coloca la serpiente inicial (cabeza primero) y nueva comida."""
+        cx, cy = self.grid_w // 2, self.grid_h // 2
+        self.set_body([(cx, cy), (cx - 1, cy), (cx - 2, cy)], RIGHT)
+
+    def set_body(self, segments, direction):
+        """Sustituye la serpiente por segments (cabeza primero) y su dirección.
+
+        Actualiza la rejilla y el índice de celdas libres en O(longitud) y
+        vuelve a colocar toda la comida.
+        """
+        w = self.grid_w
+        occupied = self.occupied
+        for (x, y) in self.snake:
+            occupied[y * w + x] = EMPTY
+            self._release_cell(y * w + x)
+        for (x, y) in self.foods:
+            occupied[y * w + x] = EMPTY
+            self._release_cell(y * w + x)
+        self.snake = deque(segments)
+        for (x, y) in self.snake:
+            occupied[y * w + x] = BODY
+            self._take_cell(y * w + x)
+        self.direction = direction
+        self.turn_queue.clear()
+        self.foods = []
+        for _ in range(self.food_count):
+            self._place_food()
+
+    # ----------------- CELDAS LIBRES -----------------
+    def _take_cell(self, cell):
+        """Saca cell del índice de libres (swap con el último)."""
+        free = self.free_cells
+        pos = self.free_pos
+        i = pos[cell]
+        last = free.pop()
+        if last != cell:
+            free[i] = last
+            pos[last] = i
+        pos[cell] = -1
+
+    def _release_cell(self, cell):
+        """Devuelve cell al índice de libres."""
+        self.free_pos[cell] = len(self.free_cells)
+        self.free_cells.append(cell)
+
+    def _place_food(self):
+        """Coloca una comida en una celda libre uniforme; None si no queda sitio."""
+        free = self.free_cells
+        if not free:
+            return None
+        cell = free[self.rng.randrange(len(free))]
+        self._take_cell(cell)
+        self.occupied[cell] = FOOD
+        food = (cell % self.grid_w, cell // self.grid_w)
+        self.foods.append(food)
+        return food
+
+    # ----------------- ENTRADAS -----------------
+    def turn(self, new_dir):
+        """Encola un cambio de dirección para los próximos movimientos.
+
+        Se compara con el último giro encolado (o con la dirección actual):
+        rechaza repetirlo, el giro de 180° y los giros con la cola llena.
+        Así "arriba, izquierda" dentro de un mismo movimiento se aplica en
+        dos movimientos en lugar de quedarse sólo con el último.
+        """
+        queue = self.turn_queue
+        last = queue[-1] if queue else self.direction
+        if new_dir == last or new_dir == (-last[0], -last[1]) or len(queue) >= MAX_QUEUED_TURNS:
+            return False
+        queue.append(new_dir)
+        return True
+
+    @property
+    def next_direction(self):
+        """Dirección del próximo movimiento."""
+        return self.turn_queue[0] if self.turn_queue else self.direction
+
+    def change_speed(self, delta):
+        """Ajusta la velocidad (celdas por segundo) dentro de límites."""
+        self.speed = max(MIN_SPEED, min(MAX_SPEED, self.speed + delta))
+        return self.speed
+
+    # ----------------- REGLAS -----------------
+    def tick(self):
+        """Avanza un tick lógico de LOGIC_STEP_MS.
+
+        Devuelve el resultado de step() si en este tick toca mover, RESPAWNED
+        o FINISHED al terminar las esperas de muerte / game over, o None.
+        """
+        self.ticks += 1
+        if self.dead or self.game_over:
+            if self.finished:
+                return None
+            self.death_ms += LOGIC_STEP_MS
+            if self.game_over:
+                if self.death_ms >= DEATH_MS + GAME_OVER_MS:
+                    self.finished = True
+                    return FINISHED
+            elif self.death_ms >= DEATH_MS:
+                self.respawn()
+                return RESPAWNED
+            return None
+        self.move_progress += self.speed * (LOGIC_STEP_MS / 1000.0)
+        if self.move_progress < 1.0:
+            return None
+        self.move_progress -= 1.0
+        return self.step()
+
+    def step(self, action=None):
+        """Avanza un movimiento y devuelve MOVED, ATE, DIED o GAME_OVER.
+
+        Tras DIED la serpiente queda quieta en su sitio (dead) hasta que
+        tick() cumple DEATH_MS; si se llama a step() antes, reaparece ya.
+        """
+        if self.game_over:
+            return GAME_OVER
+        if self.dead:
+            self.respawn()
+        if action is not None:
+            self.turn(action)
+        self.steps += 1
+        if self.turn_queue:
+            self.direction = self.turn_queue.popleft()
+
+        snake = self.snake
+        occupied = self.occupied
+        head_x, head_y = snake[0]
+        dx, dy = self.direction
+        nx, ny = head_x + dx, head_y + dy
+        new_head = (nx, ny)
+        cell = ny * self.grid_w + nx
+
+        # Colisión con bordes o consigo misma => perder vida.
+        # La cola se mueve en este mismo paso, así que entrar en su celda es válido.
+        if (nx < 0 or nx >= self.grid_w or ny < 0 or ny >= self.grid_h
+                or (occupied[cell] == BODY and new_head != snake[-1])):
+            self.lives -= 1
+            self.death_ms = 0.0
+            self.move_progress = 0.0
+            if self.lives <= 0:
+                self.game_over = True
+                return GAME_OVER
+            self.dead = True
+            return DIED
+
+        if occupied[cell] == FOOD:
+            # La celda de comida ya estaba fuera del índice de libres
+            snake.appendleft(new_head)
+            occupied[cell] = BODY
+            self.foods.remove(new_head)
+            self.score += FOOD_SCORE
+            self._place_food()
+            return ATE
+        # Liberar la cola antes de ocupar la cabeza (pueden ser la misma celda).
+        # Equivale a _release_cell(tail) + _take_cell(cell), en línea por ser
+        # el camino más frecuente.
+        tail_x, tail_y = snake.pop()
+        tail = tail_y * self.grid_w + tail_x
+        snake.appendleft(new_head)
+        occupied[tail] = EMPTY
+        occupied[cell] = BODY
+        if tail != cell:
+            free = self.free_cells
+            pos = self.free_pos
+            i = pos[cell]
+            free[i] = tail
+            pos[tail] = i
+            pos[cell] = -1
+        return MOVED
+
+    @property
+    def head(self):
+        return self.snake[0]
+
+    @property
+    def food(self):
+        """Primera comida (None si el tablero está lleno)."""
+        return self.foods[0] if self.foods else None
+
+    def __len__(self):
+        return len(self.snake)
+
+    def state_hash(self):
+        """CRC32 del estado de la partida (rejilla, serpiente, giros, escalares).
+
+        Dos partidas con la misma semilla y las mismas entradas dan la misma
+        secuencia de hashes tick a tick.
+        """
+        crc = zlib.crc32(self.occupied)
+        crc = zlib.crc32(array("i", chain.from_iterable(self.snake)), crc)
+        crc = zlib.crc32(array("b", chain.from_iterable(self.turn_queue)), crc)
+        flags = self.dead | self.game_over << 1 | self.finished << 2
+        dx, dy = self.direction
+        return zlib.crc32(STATE_SCALARS.pack(
+            self.lives, self.score, dx, dy, flags, self.speed, self.move_progress, self.death_ms
+        ), crc)
+
+    # ----------------- SNAPSHOTS -----------------
+    def _cell_typecode(self):
+        return "H" if self.grid_w * self.grid_h <= 0x10000 else "I"
+
+    def snapshot(self):
+        """Estado completo de la partida en bytes (ver restore()).
+
+        Incluye el orden del índice de celdas libres y el estado del RNG:
+        la comida que se coloque después de restaurar es la misma.
+        """
+        dx, dy = self.direction
+        flags = self.dead | self.game_over << 1 | self.finished << 2
+        header = SNAPSHOT_HEADER.pack(
+            self.ticks, self.steps,
+            self.lives, self.score, dx, dy, flags, self.speed, self.move_progress, self.death_ms,
+            len(self.snake), len(self.turn_queue), len(self.foods), len(self.free_cells),
+        )
+        version, rng_state, gauss_next = self.rng.getstate()
+        return b"".join((
+            header,
+            array("i", chain.from_iterable(self.snake)).tobytes(),
+            array("b", chain.from_iterable(self.turn_queue)).tobytes(),
+            array("i", chain.from_iterable(self.foods)).tobytes(),
+            array(self._cell_typecode(), self.free_cells).tobytes(),
+            array("I", rng_state).tobytes(),
+        ))
+
+    def restore(self, data):
+        """Restaura un estado guardado con snapshot() (mismo tamaño de tablero)."""
+        (self.ticks, self.steps,
+         self.lives, self.score, dx, dy, flags, self.speed, self.move_progress, self.death_ms,
+         n_snake, n_queue, n_foods, n_free) = SNAPSHOT_HEADER.unpack_from(data, 0)
+        pos = SNAPSHOT_HEADER.size
+
+        def take(typecode, n):
+            nonlocal pos
+            values = array(typecode)
+            values.frombytes(bytes(data[pos:pos + n * values.itemsize]))
+            pos += n * values.itemsize
+            return values
+
+        body = take("i", 2 * n_snake)
+        queue = take("b", 2 * n_queue)
+        foods = take("i", 2 * n_foods)
+        free = take(self._cell_typecode(), n_free)
+        rng_state = take("I", 625)
+
+        self.direction = (dx, dy)
+        self.dead = bool(flags & 1)
+        self.game_over = bool(flags & 2)
+        self.finished = bool(flags & 4)
+        self.snake = deque(zip(body[0::2], body[1::2]))
+        self.turn_queue = deque(zip(queue[0::2], queue[1::2]))
+        self.foods = list(zip(foods[0::2], foods[1::2]))
+        # Rejilla e índice de celdas libres, en el mismo orden que al guardar
+        w = self.grid_w
+        occupied = self.occupied
+        occupied[:] = bytes(len(occupied))
+        for (x, y) in self.snake:
+            occupied[y * w + x] = BODY
+        for (x, y) in self.foods:
+            occupied[y * w + x] = FOOD
+        self.free_cells = free.tolist()
+        self.free_pos = [-1] * len(occupied)
+        for i, cell in enumerate(self.free_cells):
+            self.free_pos[cell] = i
+        self.rng.setstate((3, tuple(rng_state), None))
+
+    @property
+    def sim_ms(self):
+        """Tiempo simulado transcurrido (ms)."""
+        return self.ticks * LOGIC_STEP_MS
+
+
+class FixedTimestep:
+    """Acumulador de paso fijo: convierte tiempo real en ticks lógicos.
+
+    advance(elapsed_ms) devuelve cuántos ticks hay que simular este frame.
+    Como mucho max_ticks por frame; el resto queda pendiente para los
+    siguientes (hasta max_backlog_ms, a partir de ahí se descarta).
+    """
+
+    def __init__(self, step_ms=LOGIC_STEP_MS, max_ticks=MAX_CATCHUP_TICKS, max_backlog_ms=MAX_BACKLOG_MS):
+        self.step_ms = step_ms
+        self.max_ticks = max_ticks
+        self.max_backlog_ms = max_backlog_ms
+        self.accumulator = 0.0
+        self.dropped_ms = 0.0
+
+    def reset(self):
+        self.accumulator = 0.0
+
+    def advance(self, elapsed_ms):
+        acc = self.accumulator + max(0.0, elapsed_ms)
+        if acc > self.max_backlog_ms:
+            self.dropped_ms += acc - self.max_backlog_ms
+            acc = self.max_backlog_ms
+        n = min(int(acc // self.step_ms), self.max_ticks)
+        self.accumulator = acc - n * self.step_ms
+        return n
+
+    def stats(self):
+        return (f"FixedTimestep: {self.dropped_ms:.0f} ms de retraso descartados "
+                f"(más de {self.max_backlog_ms:.0f} ms pendientes)")
@@ -0,0 +1,104 @@
+"""
+Tests de present_frame() con los dos backends (software y gpu) sin ventana
+(SDL_VIDEODRIVER=dummy; el backend gpu usa el renderer por software de SDL).
+
+Uso:
+    python -m pytest test_present_frame.py
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+# Los sonidos se cargan con rutas relativas al importar el juego
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+import pygame  # noqa: E402
+import pytest  # noqa: E402
+
+import pong_dualsense as game  # noqa: E402  (necesita las variables SDL antes)
+
+WINDOW = (1000, 1000)   # más alta que el canvas: barras arriba y abajo
+CANVAS_COLOR = (200, 120, 40)
+DIRTY_COLOR = (255, 0, 0)
+DIRTY = pygame.Rect(0, 0, 100, 100)
+
+
+@pytest.fixture(params=["software", "gpu"])
+def backend(request):
+    if game.open_display(request.param) != request.param:
+        pytest.skip("renderer SDL2 no disponible")
+    game.canvas.fill(CANVAS_COLOR)
+    yield request.param
+    if game.gpu_presenter is not None:
+        game.gpu_presenter.window.destroy()
+    game.open_display("software")
+
+
+def resize_window(size):
+    if game.gpu_presenter is not None:
+        game.gpu_presenter.window.size = size
+    else:
+        game.screen = pygame.display.set_mode(size, game.screen_flags)
+    pygame.event.pump()
+
+
+def test_present_full_and_dirty(backend):
+    game.present_frame(None)
+    game.canvas.fill(DIRTY_COLOR, DIRTY)
+    # Rects vacíos o fuera del canvas se ignoran
+    game.present_frame([DIRTY, pygame.Rect(game.SCREEN_W - 10, 0, 50, 50), pygame.Rect(-40, -40, 20, 20)])
+    game.present_frame([])
+    if backend == "software":
+        # 1:1: el canvas se copia sin escalar
+        assert game.screen.get_size() == (game.SCREEN_W, game.SCREEN_H)
+        assert game.screen.get_at((10, 10))[:3] == DIRTY_COLOR
+        assert game.screen.get_at((game.SCREEN_W // 2, game.SCREEN_H // 2))[:3] == CANVAS_COLOR
+
+
+def test_letterbox():
+    scale, rect = game.letterbox((game.SCREEN_W, game.SCREEN_H))
+    assert scale == 1.0 and rect == pygame.Rect(0, 0, game.SCREEN_W, game.SCREEN_H)
+    # Ventana más ancha: barras a los lados
+    scale, rect = game.letterbox((game.SCREEN_W * 2, game.SCREEN_H))
+    assert scale == 1.0 and rect == pygame.Rect(game.SCREEN_W // 2, 0, game.SCREEN_W, game.SCREEN_H)
+    # Ventana más alta: barras arriba y abajo
+    scale, rect = game.letterbox(WINDOW)
+    assert rect.x == 0 and rect.w == WINDOW[0]
+    assert rect.y == (WINDOW[1] - rect.h) // 2 > 0
+
+
+def test_letterbox_after_resize(backend):
+    resize_window(WINDOW)
+    scale, target = game.letterbox(WINDOW)
+    game.present_frame(None)
+    game.canvas.fill(DIRTY_COLOR, DIRTY)
+    game.present_frame([DIRTY])
+    if backend == "software":
+        screen = game.screen
+        assert screen.get_size() == WINDOW
+        # Barras negras fuera del rect del letterbox
+        assert screen.get_at((WINDOW[0] // 2, target.y // 2))[:3] == (0, 0, 0)
+        assert screen.get_at((WINDOW[0] // 2, target.bottom + 2))[:3] == (0, 0, 0)
+        assert screen.get_at(target.center)[:3] == CANVAS_COLOR
+        # La zona sucia se escala a su sitio dentro del letterbox
+        assert screen.get_at((target.x + 10, target.y + 10))[:3] == DIRTY_COLOR
+    else:
+        # El renderer escala con logical_size: misma escala y mismo desplazamiento
+        renderer = game.gpu_presenter.renderer
+        assert renderer.logical_size == (game.SCREEN_W, game.SCREEN_H)
+        assert renderer.scale[0] == pytest.approx(scale, rel=1e-3)
+        viewport = renderer.get_viewport()
+        assert abs(viewport.x * scale - target.x) <= 1
+        assert abs(viewport.y * scale - target.y) <= 1
+
+
+def test_gpu_fallback_to_software(monkeypatch):
+    monkeypatch.setattr(game.GpuPresenter, "create", classmethod(lambda cls, *args, **kwargs: None))
+    assert game.open_display("gpu") == "software"
+    assert game.RENDER_BACKEND == "software"
+    assert game.gpu_presenter is None
+    assert game.screen is not None
+    game.canvas.fill(CANVAS_COLOR)
+    game.present_frame(None)
+    game.present_frame([DIRTY])
+    assert game.screen.get_at(DIRTY.center)[:3] == CANVAS_COLOR
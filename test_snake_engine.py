@@ -0,0 +1,33 @@
+"""
+Tests del motor de Snake (sin pygame).
+
+Uso:
+    python -m pytest test_snake_engine.py
+"""
+import random
+
+import pytest
+
+from snake_engine import SnakeEngine, UP, DOWN, LEFT, RIGHT
+
+
+def play(engine, steps, seed=0):
+    """Juega steps movimientos con giros pseudoaleatorios."""
+    rng = random.Random(seed)
+    for _ in range(steps):
+        engine.step(rng.choice((UP, DOWN, LEFT, RIGHT, None)))
+
+
+@pytest.mark.parametrize("seed", [0, 5, 12345])
+def test_reset_matches_new_engine(seed):
+    engine = SnakeEngine(seed=1)
+    play(engine, 300)
+    engine.reset(seed)
+    fresh = SnakeEngine(seed=seed)
+    assert engine.foods == fresh.foods
+    assert engine.state_hash() == fresh.state_hash()
+    # Y siguen igual al jugar
+    play(engine, 300, seed=seed)
+    play(fresh, 300, seed=seed)
+    assert engine.foods == fresh.foods
+    assert engine.state_hash() == fresh.state_hash()